@@ -0,0 +1,489 @@
+# -*- coding: utf-8 -*-
+
+"""Micro-benchmarks for the game's hot paths.
+
+Run with ``python benchmark.py`` for a report comparing the current code
+with the original implementations. Rendering benchmarks use SDL's dummy
+video driver unless ``SDL_VIDEODRIVER`` is already set.
+
+The regression suite times each hot path on fixed seeded states and can
+store the results as a JSON baseline and compare later runs against it::
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json --threshold 0.15
+
+``--compare`` exits with status 1 when any benchmark is slower than the
+baseline by more than the threshold (a fraction, default 0.10).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import random
+import timeit
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import pygame
+from tetromino import Tetromino, SHAPES
+from board import Board
+from placements import find_placements
+from particle import ParticleSystem, ParticleSpriteCache
+from constants import *
+from engine import TetrisEngine
+from bot import BeamSearchBot
+from main import TetrisGame
+
+class LegacyParticle:
+    """Original particle object that allocates a Surface on every draw"""
+    def __init__(self, x, y, color):
+        self.x = x
+        self.y = y
+        self.vx = random.uniform(-3, 3)
+        self.vy = random.uniform(-5, -1)
+        self.color = color
+        self.life = PARTICLE_LIFE
+        self.max_life = PARTICLE_LIFE
+        self.size = random.randint(2, 4)
+
+    def update(self):
+        self.x += self.vx
+        self.y += self.vy
+        self.vy += 0.2  # Gravity
+        self.life -= 1
+        self.size = max(0, self.size - 0.1)
+
+    def draw(self, screen):
+        if self.life > 0:
+            alpha = int(255 * (self.life / self.max_life))
+            color = (*self.color, alpha)
+            surf = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surf, color, (self.size, self.size), self.size)
+            screen.blit(surf, (self.x - self.size, self.y - self.size))
+
+    def is_alive(self):
+        return self.life > 0
+
+def legacy_get_positions(piece):
+    """Original implementation that scans the ASCII shape on every call"""
+    positions = []
+    for i, row in enumerate(piece.shape):
+        for j, cell in enumerate(row):
+            if cell == '#':
+                positions.append((piece.x + j, piece.y + i))
+    return positions
+
+def time_per_call(func, number, repeat=5):
+    """Best-of-``repeat`` time per call in microseconds"""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+# More repeats make suite minimums steadier on a busy machine
+SUITE_REPEAT = 15
+
+def bench_get_positions(number=100000):
+    """Compare string scanning with the precomputed rotation table"""
+    pieces = [Tetromino(shape_type) for shape_type in SHAPES]
+    for piece in pieces:
+        piece.rotate()
+
+    def legacy():
+        for piece in pieces:
+            legacy_get_positions(piece)
+
+    def table():
+        for piece in pieces:
+            piece.get_positions()
+
+    legacy_us = time_per_call(legacy, number) / len(pieces)
+    table_us = time_per_call(table, number) / len(pieces)
+    return {'legacy_us': legacy_us, 'table_us': table_us, 'speedup': legacy_us / table_us}
+
+def bench_particles(rows=4, frames=60, number=20):
+    """Spawn a ``rows``-line clear burst and run ``frames`` updates"""
+    width = GRID_WIDTH
+    origins = [(x * 32, y * 32) for y in range(rows) for x in range(width)]
+    color = (255, 255, 255)
+
+    def legacy():
+        particles = []
+        for x, y in origins:
+            for _ in range(EXPLOSION_PARTICLE_COUNT):
+                particles.append(LegacyParticle(x + random.randint(0, 32), y + random.randint(0, 32), color))
+        for _ in range(frames):
+            particles = [p for p in particles if p.is_alive()]
+            for particle in particles:
+                particle.update()
+
+    system = ParticleSystem()
+
+    def vectorized():
+        system.clear()
+        xs, ys = zip(*origins)
+        system.spawn(xs, ys, color, count=EXPLOSION_PARTICLE_COUNT, jitter=32)
+        for _ in range(frames):
+            system.update()
+
+    legacy_us = time_per_call(legacy, number) / frames
+    numpy_us = time_per_call(vectorized, number) / frames
+    return {'legacy_us': legacy_us, 'numpy_us': numpy_us, 'speedup': legacy_us / numpy_us}
+
+def bench_particle_draw(rows=4, frames=60, number=3):
+    """Draw a ``rows``-line clear burst for ``frames`` frames.
+
+    Returns per-frame draw time and the number of surfaces allocated over
+    the whole run for per-particle Surfaces versus the sprite cache.
+    """
+    pygame.display.init()
+    screen = pygame.display.set_mode((800, 800))
+    origins = [(100 + x * 32, 100 + y * 32) for y in range(rows) for x in range(GRID_WIDTH)]
+    colors = [(0, 255, 255), (255, 120, 180), (255, 200, 80)]
+
+    def legacy():
+        particles = [LegacyParticle(x + random.randint(0, 32), y + random.randint(0, 32), colors[i % 3])
+                     for i, (x, y) in enumerate(origins) for _ in range(EXPLOSION_PARTICLE_COUNT)]
+        allocations = 0
+        for _ in range(frames):
+            particles = [p for p in particles if p.is_alive()]
+            for particle in particles:
+                particle.update()
+                particle.draw(screen)
+                allocations += particle.is_alive()
+        return allocations
+
+    system = ParticleSystem(seed=0)
+    sprites = ParticleSpriteCache()
+
+    def cached():
+        system.clear()
+        xs, ys = zip(*origins)
+        system.spawn(xs, ys, [colors[i % 3] for i in range(len(origins))],
+                     count=EXPLOSION_PARTICLE_COUNT, jitter=32)
+        for _ in range(frames):
+            system.update()
+            screen.blits(sprites.blit_sequence(system), doreturn=False)
+
+    legacy_allocations = legacy()
+    cached()
+    cold_allocations = sprites.allocations
+    cached()
+    legacy_us = time_per_call(legacy, number) / frames
+    cached_us = time_per_call(cached, number) / frames
+    return {'legacy_us': legacy_us, 'cached_us': cached_us, 'speedup': legacy_us / cached_us,
+            'legacy_allocations': legacy_allocations, 'cold_allocations': cold_allocations,
+            'warm_allocations': sprites.allocations - cold_allocations}
+
+def bench_ghost(height=GRID_HEIGHT, number=20000):
+    """Landing-row lookup: stepping down with is_collision versus the column tops"""
+    board = Board(GRID_WIDTH, height)
+    for x in range(GRID_WIDTH):
+        board.fill(x, height - 1 - x % 3, (255, 255, 255))
+    piece = Tetromino('T')
+
+    def legacy():
+        y = piece.y
+        while not board.collides(piece.get_row_masks(), piece.x, y + 1):
+            y += 1
+        return y
+
+    def skyline():
+        return board.landing_y(piece.data, piece.x, piece.y)
+
+    legacy_us = time_per_call(legacy, number)
+    skyline_us = time_per_call(skyline, number)
+    return {'legacy_us': legacy_us, 'skyline_us': skyline_us, 'speedup': legacy_us / skyline_us}
+
+def bench_placements(seed=0, number=200):
+    """Placements enumerated per second on a seeded, partly filled board"""
+    rng = random.Random(seed)
+    board = Board(GRID_WIDTH, GRID_HEIGHT)
+    for _ in range(60):
+        board.fill(rng.randrange(GRID_WIDTH), rng.randrange(GRID_HEIGHT // 2, GRID_HEIGHT), (255, 255, 255))
+    rows = tuple(board.rows)
+    spawn_x = Tetromino('T').x
+    per_round = sum(len(find_placements(rows, GRID_WIDTH, shape_type, spawn_x)) for shape_type in SHAPES)
+
+    def enumerate_all():
+        for shape_type in SHAPES:
+            find_placements(rows, GRID_WIDTH, shape_type, spawn_x)
+
+    seconds = time_per_call(enumerate_all, number) / 1e6
+    return {'placements_per_round': per_round, 'placements_per_second': per_round / seconds}
+
+def bench_bot(pieces=200, seed=0):
+    """Decision latency and search throughput of the autoplay bot"""
+    engine = TetrisEngine(seed=seed)
+    engine.start_game()
+    bot = BeamSearchBot(beam_width=AUTOPLAY_BEAM_WIDTH, depth=AUTOPLAY_DEPTH)
+    for _ in range(pieces):
+        if engine.is_over or not bot.play_piece(engine):
+            break
+    result = bot.stats()
+    result['lines_cleared'] = engine.lines_cleared
+    return result
+
+def make_game(seed=0, filled_rows=8):
+    """Create a TetrisGame in PLAYING state on a seeded, partly filled board"""
+    rng = random.Random(seed)
+    game = TetrisGame()
+    if game.recorder:
+        game.recorder.detach()
+        game.recorder = None
+    game.engine.start_game(seed=seed)
+    board = game.engine.board
+    colors = list(SHAPES)
+    for y in range(board.height - filled_rows, board.height):
+        holes = rng.sample(range(board.width), 2)
+        for x in range(board.width):
+            if x not in holes:
+                board.fill(x, y, TETROMINO_COLORS[rng.choice(colors)])
+    return game
+
+def legacy_draw_cells(screen, grid):
+    """Original per-frame redraw of every locked and empty cell"""
+    for y, row in enumerate(grid):
+        for x, color in enumerate(row):
+            cell_rect = pygame.Rect(GRID_OFFSET_X + x * CELL_SIZE, GRID_OFFSET_Y + y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+            pygame.draw.rect(screen, color or (30, 30, 50), cell_rect, border_radius=8)
+            pygame.draw.rect(screen, GRAY, cell_rect, 1, border_radius=8)
+
+def bench_draw_grid(frames=200):
+    """Per-frame board cost: redrawing every cell versus the cached board surface"""
+    game = make_game()
+    renderer = game.renderer
+    renderer.draw_grid()
+    legacy_us = time_per_call(lambda: legacy_draw_cells(game.screen, game.engine.grid), frames)
+    cached_us = time_per_call(renderer.draw_grid, frames)
+    return {'legacy_us': legacy_us, 'cached_us': cached_us, 'speedup': legacy_us / cached_us}
+
+def bench_render_game(frames=200):
+    """Per-frame render_game time with and without cached static layers"""
+    game = make_game()
+    renderer = game.renderer
+    results = {}
+    for cached in (False, True):
+        renderer.cache_static_layers = cached
+        renderer.invalidate_layers()
+        renderer.render_game()
+        results['cached_us' if cached else 'uncached_us'] = time_per_call(renderer.render_game, frames)
+    results['speedup'] = results['uncached_us'] / results['cached_us']
+    return results
+
+def bench_render_menu(frames=200):
+    """Menu and game-over frame time with a cold versus warm text cache"""
+    game = make_game()
+    renderer = game.renderer
+    results = {}
+    for name, render in (('menu', renderer.render_menu), ('game_over', renderer.render_game_over)):
+        def cold():
+            renderer.text_cache.clear()
+            render()
+        results[name + '_cold_us'] = time_per_call(cold, frames)
+        results[name + '_warm_us'] = time_per_call(render, frames)
+    cache = renderer.text_cache
+    results['hit_rate'] = cache.hits / (cache.hits + cache.misses)
+    return results
+
+def fill_rows(board, rows, rng, holes=1):
+    """Fill ``rows`` with random colors, leaving ``holes`` empty cells per row"""
+    colors = list(TETROMINO_COLORS.values())
+    for y in rows:
+        empty = rng.sample(range(board.width), holes) if holes else []
+        for x in range(board.width):
+            if x not in empty:
+                board.fill(x, y, rng.choice(colors))
+
+def suite_is_collision(number=20000):
+    """GameLogic.is_collision for every piece on a seeded board, per call"""
+    engine = TetrisEngine(seed=0)
+    engine.start_game(seed=0)
+    fill_rows(engine.board, range(GRID_HEIGHT - 8, GRID_HEIGHT), random.Random(0), holes=2)
+    pieces = [Tetromino(shape_type) for shape_type in SHAPES]
+    for i, piece in enumerate(pieces):
+        piece.y = GRID_HEIGHT - 10 + i % 3
+    is_collision = engine.logic.is_collision
+
+    def run():
+        for piece in pieces:
+            is_collision(piece, 0, 1)
+
+    return time_per_call(run, number, SUITE_REPEAT) / len(pieces)
+
+def suite_clear_lines(full_rows, number=2000, width=GRID_WIDTH, height=GRID_HEIGHT):
+    """GameLogic.clear_lines with ``full_rows`` complete rows at the bottom.
+
+    Checks the bottom four rows, as after placing a piece there.
+    """
+    engine = TetrisEngine(seed=0, width=width, height=height)
+    engine.start_game(seed=0)
+    board = engine.board
+    rng = random.Random(full_rows)
+    stack = height - 8
+    fill_rows(board, range(stack, height - full_rows), rng)
+    fill_rows(board, range(height - full_rows, height), rng, holes=0)
+    saved = board.copy()
+    touched = range(height - 4, height)
+
+    def restore():
+        # Rows above the stack stay empty
+        board.rows[stack:] = saved.rows[stack:]
+        board.tops[:] = saved.tops
+        board.cells[stack:] = [list(row) for row in saved.cells[stack:]]
+
+    def run():
+        restore()
+        engine.logic.clear_lines(touched)
+
+    # Report the clear alone, without restoring the board
+    return max(0.0, time_per_call(run, number, SUITE_REPEAT) - time_per_call(restore, number, SUITE_REPEAT))
+
+def suite_ghost_position(number=20000):
+    """GameLogic.get_ghost_position with its cache missing on every call"""
+    engine = TetrisEngine(seed=0)
+    engine.start_game(seed=0)
+    fill_rows(engine.board, range(GRID_HEIGHT - 8, GRID_HEIGHT), random.Random(0), holes=2)
+    logic = engine.logic
+
+    def run():
+        logic.ghost_key = None
+        logic.get_ghost_position()
+
+    return time_per_call(run, number, SUITE_REPEAT)
+
+def suite_get_positions(number=100000):
+    """Tetromino.get_positions averaged over all shapes"""
+    return bench_get_positions(number)['table_us']
+
+def suite_update_particles(count=4000, frames=50, number=5):
+    """ParticleSystem.update per frame with ``count`` live particles"""
+    system = ParticleSystem(seed=0)
+    xs = [x * 7 % 400 for x in range(count)]
+
+    def run():
+        system.clear()
+        system.spawn(xs, 100, (255, 255, 255))
+        for _ in range(frames):
+            system.update()
+
+    return time_per_call(run, number, SUITE_REPEAT) / frames
+
+def suite_render_game(frames=200):
+    """Renderer.render_game frame on a seeded board with particles in flight"""
+    game = make_game(seed=0)
+    game.particles.spawn([GRID_OFFSET_X + x * CELL_SIZE for x in range(GRID_WIDTH)], GRID_OFFSET_Y + 400,
+                         (0, 255, 255), count=EXPLOSION_PARTICLE_COUNT, jitter=CELL_SIZE)
+    game.renderer.render_game()
+    return time_per_call(game.renderer.render_game, frames, SUITE_REPEAT)
+
+# Regression suite: name -> function returning microseconds per call
+SUITE = {
+    'is_collision': suite_is_collision,
+    'clear_lines_1': lambda: suite_clear_lines(1),
+    'clear_lines_2': lambda: suite_clear_lines(2),
+    'clear_lines_3': lambda: suite_clear_lines(3),
+    'clear_lines_4': lambda: suite_clear_lines(4),
+    'clear_lines_4_100x1000': lambda: suite_clear_lines(4, 500, 100, 1000),
+    'ghost_position': suite_ghost_position,
+    'get_positions': suite_get_positions,
+    'update_particles_4000': suite_update_particles,
+    'render_game': suite_render_game,
+}
+
+def run_suite(names=None):
+    """Run the regression suite (or the named subset) and return a baseline dict"""
+    results = {}
+    for name in names or SUITE:
+        results[name] = SUITE[name]()
+        print(f"{name:<24} {results[name]:10.3f} us")
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+        },
+        'results_us': results,
+    }
+
+def compare(baseline, current, threshold=0.10):
+    """Print per-benchmark changes; returns the names that regressed"""
+    regressions = []
+    for name, new in current['results_us'].items():
+        old = baseline['results_us'].get(name)
+        if old is None:
+            print(f"{name:<24} {new:10.3f} us   (not in baseline)")
+            continue
+        change = (new - old) / old if old else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<24} {old:10.3f} -> {new:10.3f} us  {change:+7.1%}{flag}")
+    return regressions
+
+def report():
+    result = bench_get_positions()
+    print(f"Tetromino.get_positions: {result['legacy_us']:.3f} us (string scan) -> "
+          f"{result['table_us']:.3f} us (table), {result['speedup']:.1f}x faster")
+    result = bench_particles()
+    print(f"Particle update (4-line clear): {result['legacy_us']:.1f} us/frame (objects) -> "
+          f"{result['numpy_us']:.1f} us/frame (NumPy), {result['speedup']:.1f}x faster")
+    result = bench_particle_draw()
+    print(f"Particle draw (4-line clear): {result['legacy_us']:.1f} us/frame, "
+          f"{result['legacy_allocations']} surfaces (per-particle) -> "
+          f"{result['cached_us']:.1f} us/frame, {result['cold_allocations']} surfaces cold / "
+          f"{result['warm_allocations']} warm (sprite cache), {result['speedup']:.1f}x faster")
+    for height in (GRID_HEIGHT, 1000):
+        result = bench_ghost(height, number=400000 // height)
+        print(f"Landing row ({height} rows): {result['legacy_us']:.2f} us (walk) -> "
+              f"{result['skyline_us']:.2f} us (column tops), {result['speedup']:.1f}x faster")
+    result = bench_placements()
+    print(f"Placement enumeration: {result['placements_per_second']:,.0f} placements/s "
+          f"({result['placements_per_round']} per round of all 7 pieces)")
+    result = bench_bot()
+    print(f"Autoplay bot: {result['mean_latency_ms']:.2f} ms mean / {result['p95_latency_ms']:.2f} ms p95 per "
+          f"decision, {result['nodes_per_second']:,.0f} nodes/s over {result['decisions']} pieces")
+    result = bench_draw_grid()
+    print(f"Board cells: {result['legacy_us']:.0f} us/frame (all cells redrawn) -> "
+          f"{result['cached_us']:.0f} us/frame (board surface + pieces), {result['speedup']:.1f}x faster")
+    result = bench_render_menu()
+    print(f"Menu: {result['menu_cold_us']:.0f} us/frame (text rasterized) -> {result['menu_warm_us']:.0f} us/frame "
+          f"(text cache); game over: {result['game_over_cold_us']:.0f} -> {result['game_over_warm_us']:.0f} us/frame, "
+          f"{result['hit_rate']:.0%} cache hits")
+    result = bench_render_game()
+    print(f"Renderer.render_game: {result['uncached_us'] / 1000:.2f} ms/frame (redrawn) -> "
+          f"{result['cached_us'] / 1000:.2f} ms/frame (static layers cached), {result['speedup']:.1f}x faster")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths")
+    parser.add_argument('--suite', action='store_true', help="run the regression suite instead of the report")
+    parser.add_argument('--save', metavar='PATH', help="run the suite and store it as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="run the suite and compare it with a baseline")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="slowdown fraction counted as a regression (default 0.10)")
+    parser.add_argument('--only', nargs='+', choices=list(SUITE), help="run only these suite benchmarks")
+    args = parser.parse_args()
+
+    if not (args.suite or args.save or args.compare):
+        report()
+        return
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    current = run_suite(args.only)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline written to {args.save}")
+    if args.compare:
+        print(f"\nCompared with {args.compare} ({baseline['meta']['created']}):")
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+from placements import landing_row
+
+class Board:
+    """Playfield stored as per-row bitmasks plus a parallel color plane.
+
+    ``rows[y]`` has bit ``x`` set when cell (x, y) is filled, so collision
+    tests are AND operations and a full row is a single compare against
+    ``full_mask``. ``cells[y][x]`` keeps the color (or None) for rendering.
+    Any width is supported since Python integers are unbounded.
+    ``version`` increases on every mutation so views can detect changes.
+    ``tops[x]`` is the highest filled row of column x (``height`` if empty),
+    kept up to date on fill and clear for constant-time drop queries.
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.full_mask = (1 << width) - 1
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        """Empty the board"""
+        self.version += 1
+        self.rows = [0] * self.height
+        self.tops = [self.height] * self.width
+        self.cells = [[None] * self.width for _ in range(self.height)]
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.width = self.width
+        board.height = self.height
+        board.full_mask = self.full_mask
+        board.version = self.version
+        board.rows = list(self.rows)
+        board.tops = list(self.tops)
+        board.cells = [list(row) for row in self.cells]
+        return board
+
+    def is_filled(self, x, y):
+        return bool(self.rows[y] >> x & 1)
+
+    def fill(self, x, y, color):
+        """Fill a single cell with a color"""
+        self.rows[y] |= 1 << x
+        self.cells[y][x] = color
+        if y < self.tops[x]:
+            self.tops[x] = y
+        self.version += 1
+
+    def collides(self, row_masks, x, y):
+        """Check a piece's row masks placed at (x, y) against walls and blocks.
+
+        ``row_masks`` is a sequence of ``(dy, left, right, bits)`` where bit 0
+        of ``bits`` is the piece's column ``left`` in row ``dy``.
+        """
+        for dy, left, right, bits in row_masks:
+            if x + left < 0 or x + right >= self.width:
+                return True
+            row = y + dy
+            if row >= self.height:
+                return True
+            if row >= 0 and self.rows[row] & (bits << (x + left)):
+                return True
+        return False
+
+    def full_rows(self, rows=None):
+        """Indices of completely filled rows, top to bottom.
+
+        ``rows`` limits the check to the given rows (such as those a piece
+        was just placed in); each costs one compare against ``full_mask``.
+        """
+        full = self.full_mask
+        if rows is None:
+            return [y for y, bits in enumerate(self.rows) if bits == full]
+        return sorted(y for y in set(rows) if self.rows[y] == full)
+
+    def clear_rows(self, rows):
+        """Remove the given rows and shift everything above them down.
+
+        One compaction pass from the lowest cleared row up to the top of the
+        stack moves each surviving row once, a run of rows at a time; the
+        empty rows above the stack are not touched. Returns the top of the
+        stack before the clear, the first row whose contents changed.
+        """
+        self.version += 1
+        cleared = sorted(set(rows))
+        count = len(cleared)
+        board_rows, cells = self.rows, self.cells
+        top = min(self.tops)
+        # Bottom-up, the run of surviving rows above each cleared row moves
+        # down by the number of cleared rows at or below it, in one slice
+        for shift in range(1, count + 1):
+            y = cleared[count - shift]
+            above = cleared[count - shift - 1] + 1 if shift < count else top
+            if y > above:
+                board_rows[above + shift:y + shift] = board_rows[above:y]
+                cells[above + shift:y + shift] = cells[above:y]
+        # The rows vacated at the top of the stack are now empty
+        board_rows[top:top + count] = [0] * count
+        cells[top:top + count] = [[None] * self.width for _ in range(count)]
+        # Surviving cells only move down and the vacated rows are empty, so
+        # each column's new top is at or below both its old top and the
+        # vacated rows; scan down from there to the first filled cell
+        start = top + count
+        tops = self.tops
+        for x, column_top in enumerate(tops):
+            if column_top < start:
+                column_top = start
+            bit = 1 << x
+            while column_top < self.height and not board_rows[column_top] & bit:
+                column_top += 1
+            tops[x] = column_top
+        return top
+
+    def add_garbage(self, count, hole, color):
+        """Push the stack up ``count`` rows and fill the bottom rows but column ``hole``.
+
+        Returns True if filled cells were pushed off the top of the board.
+        """
+        self.version += 1
+        count = min(count, self.height)
+        overflow = any(self.rows[:count])
+        bits = self.full_mask & ~(1 << hole)
+        colors = [color] * self.width
+        colors[hole] = None
+        del self.rows[:count]
+        del self.cells[:count]
+        self.rows.extend([bits] * count)
+        self.cells.extend(list(colors) for _ in range(count))
+        floor = self.height - count
+        rows, tops = self.rows, self.tops
+        for x, top in enumerate(tops):
+            if count <= top < self.height:
+                tops[x] = top - count
+            elif top < count:
+                # The column's top cells went off the board: find the new top
+                top = 0
+                while top < self.height and not rows[top] >> x & 1:
+                    top += 1
+                tops[x] = top
+            elif x != hole:
+                tops[x] = floor
+        return overflow
+
+    def set_row(self, y, colors):
+        """Overwrite row ``y`` with ``colors`` (a color or None per column).
+
+        Used to mirror a board whose rows arrive from elsewhere, such as a
+        versus server.
+        """
+        bits = 0
+        for x, color in enumerate(colors):
+            if color:
+                bits |= 1 << x
+        rows, tops = self.rows, self.tops
+        rows[y] = bits
+        self.cells[y] = list(colors)
+        for x in range(self.width):
+            if bits >> x & 1:
+                if y < tops[x]:
+                    tops[x] = y
+            elif tops[x] == y:
+                top = y + 1
+                while top < self.height and not rows[top] >> x & 1:
+                    top += 1
+                tops[x] = top
+        self.version += 1
+
+    def landing_y(self, rotation, x, y):
+        """Row where a piece at (x, y) comes to rest if dropped straight down.
+
+        ``rotation`` is a tetromino.Rotation. When every column of the piece is
+        above that column's top this is answered from ``tops`` in constant
+        time; a piece tucked under an overhang falls back to stepping down.
+        """
+        return landing_row(self.rows, self.width, self.tops, rotation, x, y)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""Beam-search autoplay bot.
+
+The bot looks ahead over the current piece, ``next_piece`` and the hold
+slot using placements.find_placements, scores candidate boards with a
+weighted heuristic and memoizes board evaluations in a bounded
+transposition table. It works on a TetrisEngine directly, so it can drive
+the pygame front end or run headless.
+"""
+
+import time
+from collections import deque
+from enums import Action
+from placements import find_placements, column_tops
+from tetromino import Tetromino
+
+# int.bit_count needs Python 3.10+
+popcount = getattr(int, 'bit_count', None) or (lambda bits: bin(bits).count('1'))
+
+# Heuristic weights (per unit of each board feature)
+DEFAULT_WEIGHTS = {
+    'aggregate_height': -0.51,
+    'holes': -0.36,
+    'bumpiness': -0.18,
+    'lines_cleared': 0.76,
+}
+
+class BeamSearchBot:
+    def __init__(self, weights=None, beam_width=8, depth=2, table_size=200000):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.beam_width = beam_width
+        self.depth = depth
+        self.table_size = table_size
+        self.table = {}
+        self.table_width = None  # board width the table's scores are for
+        # Statistics
+        self.nodes = 0
+        self.search_time = 0.0
+        self.latencies = deque(maxlen=1000)
+
+    def evaluate(self, rows, width):
+        """Heuristic score of a board (without the lines-cleared term)"""
+        if width != self.table_width:
+            # Row tuples carry the height but not the width
+            self.table.clear()
+            self.table_width = width
+        score = self.table.get(rows)
+        if score is not None:
+            return score
+        height = len(rows)
+        tops = column_tops(rows, width)
+        heights = [height - top for top in tops]
+        # Holes: empty cells with a filled cell somewhere above them
+        holes = 0
+        covered = 0
+        for bits in rows[min(tops):]:
+            holes += popcount(covered & ~bits)
+            covered |= bits
+        bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+        weights = self.weights
+        score = (weights['aggregate_height'] * sum(heights) + weights['holes'] * holes
+                 + weights['bumpiness'] * bumpiness)
+        if len(self.table) >= self.table_size:
+            # Evict the oldest entry (dicts keep insertion order)
+            del self.table[next(iter(self.table))]
+        self.table[rows] = score
+        return score
+
+    def search(self, rows, width, queue, held, can_hold=True, spawn=None):
+        """Best first move as ``(use_hold, placement)``, or None if none exist.
+
+        ``queue`` lists known upcoming shape types, active piece first;
+        ``held`` is the held shape type or None. ``spawn`` optionally gives
+        the active piece's (x, y, rotation); other pieces start at spawn.
+        """
+        start = time.perf_counter()
+        rows = tuple(rows)
+        depth = max(1, min(self.depth, len(queue) + (held is not None)))
+        # Beam entries: (score, lines, rows, queue, held, first_move)
+        beam = [(0.0, 0, rows, tuple(queue), held, None)]
+        line_weight = self.weights['lines_cleared']
+        for ply in range(depth):
+            candidates = []
+            for _, lines, board, pending, hold, first in beam:
+                for use_hold, shape_type, rest, new_hold in self.options(pending, hold, can_hold or ply > 0):
+                    if ply == 0 and not use_hold and spawn is not None:
+                        x, y, rotation = spawn
+                    else:
+                        probe = Tetromino(shape_type, width)
+                        x, y, rotation = probe.x, probe.y, 0
+                    for placement in find_placements(board, width, shape_type, x, y, rotation):
+                        self.nodes += 1
+                        total_lines = lines + placement.lines_cleared
+                        score = self.evaluate(placement.rows, width) + line_weight * total_lines
+                        move = first if first is not None else (use_hold, placement)
+                        candidates.append((score, total_lines, placement.rows, rest, new_hold, move))
+            if not candidates:
+                break
+            candidates.sort(key=lambda entry: entry[0], reverse=True)
+            beam = candidates[:self.beam_width]
+        elapsed = time.perf_counter() - start
+        self.search_time += elapsed
+        self.latencies.append(elapsed)
+        return beam[0][5]
+
+    def options(self, pending, held, can_hold):
+        """Ways to play one piece: ``(use_hold, shape, remaining_queue, held)``"""
+        if pending:
+            yield False, pending[0], pending[1:], held
+        if can_hold and pending:
+            if held is not None:
+                yield True, held, pending[1:], pending[0]
+            elif len(pending) > 1:
+                yield True, pending[1], pending[2:], pending[0]
+
+    def choose(self, engine):
+        """Search from the engine's current position"""
+        piece = engine.current_piece
+        if piece is None:
+            return None
+        queue = [piece.shape_type]
+        if engine.next_piece is not None:
+            queue.append(engine.next_piece.shape_type)
+        held = engine.held_piece.shape_type if engine.held_piece else None
+        board = engine.board
+        return self.search(board.rows, board.width, queue, held, engine.can_hold,
+                           (piece.x, piece.y, piece.rotation))
+
+    def plan_actions(self, engine, use_hold, placement):
+        """Actions that bring the engine's piece to ``placement`` and drop it"""
+        actions = [Action.HOLD] if use_hold else []
+        if use_hold:
+            # Simulate the hold to plan moves for the piece it brings in
+            piece = Tetromino(placement.shape_type, engine.board.width)
+        else:
+            piece = engine.current_piece.copy()
+        path = self.find_path(engine, piece, placement.rotation, placement.x)
+        if path is None:
+            return None
+        return actions + path + [Action.HARD_DROP]
+
+    def find_path(self, engine, piece, rotation, x):
+        """Shortest rotate/shift sequence at the piece's row, by BFS"""
+        collides = engine.board.collides
+        count = len(piece.rotations)
+        start = (piece.rotation, piece.x)
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            state = queue.popleft()
+            if state == (rotation, x):
+                path = []
+                while previous[state] is not None:
+                    state, action = previous[state]
+                    path.append(action)
+                return path[::-1]
+            r, px = state
+            for action, nr, nx in ((Action.ROTATE, (r + 1) % count, px),
+                                   (Action.MOVE_LEFT, r, px - 1),
+                                   (Action.MOVE_RIGHT, r, px + 1)):
+                if (nr, nx) not in previous and not collides(piece.rotations[nr].row_masks, nx, piece.y):
+                    previous[(nr, nx)] = (state, action)
+                    queue.append((nr, nx))
+        return None
+
+    def play_piece(self, engine):
+        """Decide and execute one placement; returns False if no move exists"""
+        move = self.choose(engine)
+        if move is None:
+            return False
+        actions = self.plan_actions(engine, *move)
+        if actions is None:
+            return False
+        for action in actions:
+            engine.apply(action)
+        return True
+
+    def stats(self):
+        """Search statistics: nodes, nodes per second and decision latency (ms)"""
+        latencies = sorted(self.latencies)
+        return {
+            'nodes': self.nodes,
+            'nodes_per_second': self.nodes / self.search_time if self.search_time else 0.0,
+            'decisions': len(latencies),
+            'mean_latency_ms': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            'p95_latency_ms': 1000 * latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+            'max_latency_ms': 1000 * latencies[-1] if latencies else 0.0,
+            'table_size': len(self.table),
+        }
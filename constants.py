@@ -5,10 +5,33 @@ SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 GRID_WIDTH = 10
 GRID_HEIGHT = 20
+MIN_BOARD_WIDTH = 4  # smallest board every piece can spawn on
+MIN_BOARD_HEIGHT = 5
 CELL_SIZE = 32
 GRID_OFFSET_X = 420
 GRID_OFFSET_Y = 90
 
+# Board sizes offered in the menu (LEFT/RIGHT). Boards are scaled to fit the
+# grid area; past MIN_CELL_SIZE they scroll in a viewport following the piece
+BOARD_SIZES = [(10, 20), (20, 40), (40, 200), (100, 1000)]
+MIN_CELL_SIZE = 6
+BOARD_AREA_WIDTH = SCREEN_WIDTH - GRID_OFFSET_X - 40
+BOARD_AREA_HEIGHT = GRID_HEIGHT * CELL_SIZE
+VIEW_MARGIN = 2  # cells kept visible around the piece when scrolling
+
+# Present only changed screen regions instead of flipping the whole window
+DIRTY_RECT_UPDATES = False
+
+# Frame timing: game logic runs at a fixed tick rate independent of rendering
+LOGIC_TICK_RATE = 120  # logic ticks per second
+MAX_LOGIC_STEPS_PER_FRAME = 8  # slow frames catch up at most this many ticks
+RENDER_FPS = 144  # frame cap, at or above common display refresh rates; 0 is uncapped (spins a CPU core)
+VSYNC = False  # sync presents to the display refresh (needs a vsync-capable driver)
+PARTICLE_UPDATE_RATE = 60  # particle animation steps per second
+
+# Profiler: frames kept in the per-phase ring buffers
+PROFILER_FRAMES = 300
+
 # Neon Night Theme Colors
 BLACK = (18, 22, 38)
 WHITE = (240, 240, 255)
@@ -42,6 +65,9 @@ GLOW = (0, 255, 255, 60)
 SHADOW = (0, 0, 0, 120)
 PROGRESS_BG = (40, 50, 80)
 PROGRESS_FG = (80, 255, 180)
+GARBAGE_COLOR = (110, 115, 140)  # Rows sent by opponents in versus play
+BOARD_COLORKEY = (255, 0, 254)  # Transparent pixels of the cached board surface
+EMPTY_CELL = (30, 30, 50)
 
 # Tetromino shapes
 TETROMINOS = {
@@ -162,6 +188,11 @@ MIN_DROP_SPEED = 50
 SPEED_INCREASE_PER_LEVEL = 50
 LINES_PER_LEVEL = 10
 
+# Gameplay input: delayed auto shift and auto repeat
+DAS_DELAY = 133  # milliseconds a direction is held before it auto-repeats
+ARR_INTERVAL = 10  # milliseconds between auto-repeated shifts; 0 = straight to the wall
+SOFT_DROP_FACTOR = 20  # soft drop runs this many times faster than gravity
+
 # Scoring
 LINE_SCORES = {1: 100, 2: 300, 3: 500, 4: 800}
 SOFT_DROP_SCORE = 1
@@ -171,6 +202,40 @@ HARD_DROP_SCORE = 2
 TIME_ATTACK_DURATION = 120000  # 2 minutes in milliseconds
 MARATHON_TARGET_LINES = 150
 
+# Autoplay Settings
+AUTOPLAY_BEAM_WIDTH = 8
+AUTOPLAY_DEPTH = 2
+AUTOPLAY_PIECE_DELAY = 100  # milliseconds between bot placements
+
+# Spectator Wall Settings (spectator.py)
+SPECTATOR_BOARDS = 16
+SPECTATOR_FPS = 60
+SPECTATOR_BUDGET_MS = 6  # simulation time per frame; boards past it wait a frame
+SPECTATOR_PIECE_DELAY = 250  # milliseconds between bot placements
+SPECTATOR_BEAM_WIDTH = 4
+SPECTATOR_RESTART_DELAY = 3000  # milliseconds a finished game stays on screen
+SPECTATOR_MAX_STEP = 250  # most game milliseconds a board advances per update
+
+# Versus Settings (netplay.py)
+VERSUS_HOST = '127.0.0.1'
+VERSUS_PORT = 7777
+VERSUS_PLAYERS = 2  # players a match waits for
+VERSUS_TICK_RATE = 60  # server simulation and sync ticks per second
+VERSUS_GARBAGE = {2: 1, 3: 2, 4: 4}  # lines cleared at once -> garbage rows sent
+VERSUS_RESTART_DELAY = 5000  # milliseconds from the end of a match to the next
+VERSUS_SEND_BUFFER = 65536  # bytes queued to a client before its updates are held back
+
+# Replay Settings
+RECORD_REPLAYS = True
+REPLAY_DIR = 'replays'
+REPLAY_KEYFRAME_INTERVAL = 50  # pieces between state keyframes
+REPLAY_FLUSH_BYTES = 65536  # buffered bytes before writing to disk
+REPLAY_SEEK_STEP = 10000  # milliseconds skipped by LEFT/RIGHT during playback
+
+# Save Settings
+AUTOSAVE = True  # save the game in progress on every piece lock and resume it at startup
+SAVE_FILE = 'savegame.json'
+
 # Particle Settings
 PARTICLE_LIFE = 60
 PARTICLE_COUNT_PER_CELL = 3
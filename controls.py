@@ -1,16 +1,44 @@
 # -*- coding: utf-8 -*-
 
+from collections import deque
 import pygame
-from enums import GameState, GameMode
+from constants import DAS_DELAY, ARR_INTERVAL, SOFT_DROP_FACTOR
+from enums import GameState, GameMode, Action
+from profiler import LatencyHistogram
 
 class InputHandler:
     def __init__(self, game):
         self.game = game
-        # Input timing variables
+        # Menu key repeat timing
         self.key_delay = 150  # milliseconds before key repeat starts
         self.key_repeat = 50  # milliseconds between key repeats
+        self.key_press_time = 0
         self.last_key_time = 0
         self.last_key = None
+        self.key_actions = {
+            pygame.K_LEFT: Action.MOVE_LEFT,
+            pygame.K_RIGHT: Action.MOVE_RIGHT,
+            pygame.K_DOWN: Action.SOFT_DROP,
+            pygame.K_SPACE: Action.HARD_DROP,
+            pygame.K_UP: Action.ROTATE,
+            pygame.K_c: Action.HOLD,
+        }
+        # Gameplay auto shift (DAS/ARR), driven by event timestamps
+        self.das = DAS_DELAY
+        self.arr = ARR_INTERVAL
+        self.soft_drop_factor = SOFT_DROP_FACTOR
+        self.pending = deque()  # (event time, action) presses not yet applied
+        self.held = {}  # key -> press time
+        self.shift_key = None
+        self.next_shift = 0
+        self.next_soft_drop = 0
+        self.latency = LatencyHistogram()
+    
+    def reset(self):
+        """Forget held keys and queued presses (on game start)"""
+        self.pending.clear()
+        self.held.clear()
+        self.shift_key = None
     
     def handle_events(self):
         """Handle all pygame events"""
@@ -19,39 +47,142 @@ class InputHandler:
                 return False
             
             if event.type == pygame.KEYDOWN:
-                self.handle_keydown(event.key)
+                self.handle_keydown(event.key, self.event_time(event))
+            elif event.type == pygame.KEYUP:
+                self.handle_keyup(event.key, self.event_time(event))
         
         return True
     
-    def handle_keydown(self, key):
+    def event_time(self, event):
+        """When an event happened, in pygame ticks.
+
+        Uses the event's SDL timestamp where pygame exposes one; otherwise
+        the time the queue was read, which is at most a frame late.
+        """
+        timestamp = getattr(event, 'timestamp', None)
+        return timestamp if timestamp is not None else pygame.time.get_ticks()
+    
+    def handle_keydown(self, key, time=None):
         """Handle key press events"""
+        if time is None:
+            time = pygame.time.get_ticks()
         if key == pygame.K_ESCAPE:
             self.handle_escape()
         elif key == pygame.K_p:
             self.handle_pause()
-        elif key == pygame.K_UP:
-            self.handle_rotate()
         elif key == pygame.K_RETURN:
             self.handle_enter()
-        # --- Move/Drop/Hard Drop/Hold only on KEYDOWN ---
-        if self.game.state == GameState.PLAYING and self.game.current_piece:
-            if key == pygame.K_LEFT:
-                if not self.game.logic.is_collision(self.game.current_piece, -1, 0):
-                    self.game.current_piece.x -= 1
-            elif key == pygame.K_RIGHT:
-                if not self.game.logic.is_collision(self.game.current_piece, 1, 0):
-                    self.game.current_piece.x += 1
+        elif key == pygame.K_F2:
+            self.game.renderer.dirty_rect_updates = not self.game.renderer.dirty_rect_updates
+        elif key == pygame.K_F3:
+            self.game.renderer.show_dirty_rects = not self.game.renderer.show_dirty_rects
+        elif key == pygame.K_F4:
+            self.game.renderer.show_input_stats = not self.game.renderer.show_input_stats
+        elif key == pygame.K_F5:
+            self.game.toggle_profiler()
+        elif key == pygame.K_F6:
+            self.game.export_profile()
+        # Gameplay presses are applied by the logic tick at their event time
+        elif key in self.key_actions and self.game.state == GameState.PLAYING:
+            self.pending.append((time, self.key_actions[key]))
+            if key in (pygame.K_LEFT, pygame.K_RIGHT):
+                # The newest direction wins and charges its own DAS
+                self.held[key] = time
+                self.shift_key = key
+                self.next_shift = time + self.das
             elif key == pygame.K_DOWN:
-                if not self.game.logic.is_collision(self.game.current_piece, 0, 1):
-                    self.game.current_piece.y += 1
-                    self.game.score += self.game.logic.soft_drop_score
-            elif key == pygame.K_SPACE:
-                while not self.game.logic.is_collision(self.game.current_piece, 0, 1):
-                    self.game.current_piece.y += 1
-                    self.game.score += self.game.logic.hard_drop_score
-                self.game.logic.place_piece()
-            elif key == pygame.K_c:
-                self.game.logic.hold_piece()
+                self.held[key] = time
+                self.next_soft_drop = time + self.soft_drop_interval()
+    
+    def handle_keyup(self, key, time=None):
+        """Stop auto shift or soft drop for a released key"""
+        if time is None:
+            time = pygame.time.get_ticks()
+        if self.held.pop(key, None) is None:
+            return
+        if key == self.shift_key:
+            # Fall back to the opposite direction if it is still held
+            other = pygame.K_RIGHT if key == pygame.K_LEFT else pygame.K_LEFT
+            if other in self.held:
+                self.shift_key = other
+                self.next_shift = time + self.das
+            else:
+                self.shift_key = None
+    
+    def soft_drop_interval(self):
+        """Milliseconds between soft drops: gravity sped up by the soft-drop factor"""
+        return max(1, self.game.engine.drop_speed / self.soft_drop_factor)
+    
+    def apply(self, action, event_time, now):
+        """Apply an action and record its input-to-state latency.
+
+        In versus play the action goes to the server instead.
+        """
+        if self.game.net is not None:
+            self.game.net.send_input(action)
+        else:
+            self.game.engine.apply(action)
+        self.latency.record(max(0, now - event_time))
+    
+    def update(self, now):
+        """Apply presses and auto repeats due by ``now`` (pygame ticks).
+
+        Called once per logic tick with the time that tick represents, so
+        when ARR is shorter than a tick several shifts land on one tick.
+        An ARR of 0 shifts straight to the wall once DAS has charged.
+        Repeats that fall due while the game is not being played are
+        dropped, and a held direction recharges DAS when play resumes.
+        """
+        while self.pending and self.pending[0][0] <= now:
+            time, action = self.pending.popleft()
+            self.apply(action, time, now)
+        if self.game.state != GameState.PLAYING:
+            self.next_shift = now + self.das
+            self.next_soft_drop = now + self.soft_drop_interval()
+            return
+        engine = self.game.engine
+        if self.shift_key is not None and self.next_shift <= now:
+            action = self.key_actions[self.shift_key]
+            if self.arr <= 0:
+                for _ in range(engine.board.width):
+                    if not self.can_shift(action):
+                        break
+                    x = engine.current_piece.x
+                    self.apply(action, self.next_shift, now)
+                    if engine.current_piece is None or engine.current_piece.x == x:
+                        break
+                self.next_shift = now
+            else:
+                # At most a board width of catch-up; no-op shifts against a
+                # wall are not applied, so replays and latency stats skip them
+                for _ in range(engine.board.width):
+                    if self.next_shift > now or not self.can_shift(action):
+                        break
+                    self.apply(action, self.next_shift, now)
+                    self.next_shift += self.arr
+                if self.next_shift <= now:
+                    self.next_shift = now + self.arr
+        if pygame.K_DOWN in self.held and self.next_soft_drop <= now:
+            interval = self.soft_drop_interval()
+            for _ in range(engine.board.height):
+                if self.next_soft_drop > now:
+                    break
+                self.apply(Action.SOFT_DROP, self.next_soft_drop, now)
+                self.next_soft_drop += interval
+            if self.next_soft_drop <= now:
+                self.next_soft_drop = now + interval
+    
+    def can_shift(self, action):
+        """Whether the current piece has room to shift in ``action``'s direction"""
+        piece = self.game.engine.current_piece
+        dx = -1 if action == Action.MOVE_LEFT else 1
+        return piece is not None and not self.game.logic.is_collision(piece, dx, 0)
+    
+    def flush(self, now):
+        """Apply every remaining press; used when a frame runs no logic tick"""
+        while self.pending:
+            time, action = self.pending.popleft()
+            self.apply(action, time, max(now, time))
     
     def handle_escape(self):
         """Handle ESC key"""
@@ -67,31 +198,10 @@ class InputHandler:
         elif self.game.state == GameState.PAUSED:
             self.game.state = GameState.PLAYING
     
-    def handle_rotate(self):
-        """Handle UP key for rotation"""
-        if self.game.state == GameState.PLAYING and self.game.current_piece:
-            original_rotation = self.game.current_piece.rotation
-            self.game.current_piece.rotate()
-            if self.game.logic.is_collision(self.game.current_piece):
-                self.game.current_piece.rotation = original_rotation
-                self.game.current_piece.shape = self.game.logic.tetrominos[self.game.current_piece.shape_type][self.game.current_piece.rotation]
-    
     def handle_enter(self):
         """Handle ENTER key"""
-        if self.game.state == GameState.MENU:
-            self.game.state = GameState.PLAYING
-            if self.game.game_mode.name == 'TIME_ATTACK':
-                self.game.time_attack_start = pygame.time.get_ticks()
-            else:
-                self.game.time_attack_start = None
-            self.game.logic.reset_game()
-        elif self.game.state == GameState.GAME_OVER:
-            self.game.state = GameState.PLAYING
-            if self.game.game_mode.name == 'TIME_ATTACK':
-                self.game.time_attack_start = pygame.time.get_ticks()
-            else:
-                self.game.time_attack_start = None
-            self.game.logic.reset_game()
+        if self.game.state in (GameState.MENU, GameState.GAME_OVER):
+            self.game.start_game()
     
     def handle_continuous_input(self):
         """Handle continuous key presses with timing"""
@@ -107,9 +217,16 @@ class InputHandler:
     def handle_menu_input(self, keys, current_time):
         """Handle input during menu state"""
         if keys[pygame.K_UP] and self.should_process_key(pygame.K_UP, current_time):
-            self.game.game_mode = GameMode((self.game.game_mode.value - 2) % 3 + 1)
+            self.game.game_mode = GameMode((self.game.game_mode.value - 2) % len(GameMode) + 1)
         elif keys[pygame.K_DOWN] and self.should_process_key(pygame.K_DOWN, current_time):
-            self.game.game_mode = GameMode(self.game.game_mode.value % 3 + 1)
+            self.game.game_mode = GameMode(self.game.game_mode.value % len(GameMode) + 1)
+        elif keys[pygame.K_LEFT] and self.should_process_key(pygame.K_LEFT, current_time):
+            self.game.cycle_board_size(-1)
+        elif keys[pygame.K_RIGHT] and self.should_process_key(pygame.K_RIGHT, current_time):
+            self.game.cycle_board_size(1)
+        elif not any(keys[key] for key in (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT)):
+            # Released: the next press counts as new
+            self.last_key = None
     
     def handle_gameplay_input(self, keys, current_time):
         """No movement here anymore!"""
@@ -125,13 +242,14 @@ class InputHandler:
         if key != self.last_key:
             # New key pressed
             self.last_key = key
+            self.key_press_time = current_time
             self.last_key_time = current_time
             return True
         else:
-            # Same key held down
-            if current_time - self.last_key_time > self.key_delay:
-                # After initial delay, check repeat rate
-                if current_time - self.last_key_time > self.key_repeat:
-                    self.last_key_time = current_time
-                    return True
+            # Same key held down: wait out the initial delay since the press,
+            # then repeat at the repeat rate since the last repeat
+            if (current_time - self.key_press_time >= self.key_delay
+                    and current_time - self.last_key_time >= self.key_repeat):
+                self.last_key_time = current_time
+                return True
         return False 
\ No newline at end of file
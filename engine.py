@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+
+import random
+from constants import GRID_WIDTH, GRID_HEIGHT, INITIAL_DROP_SPEED, TETROMINO_COLORS, GARBAGE_COLOR
+from enums import GameState, GameMode, Action
+from game_logic import GameLogic
+from board import Board
+from tetromino import Tetromino, SHAPE_TYPES
+
+# Snapshot letter of each cell color; 'G' is garbage from versus play
+CELL_COLORS = dict(TETROMINO_COLORS, G=GARBAGE_COLOR)
+COLOR_SHAPES = {color: letter for letter, color in CELL_COLORS.items()}
+
+
+class SimulationClock:
+    """Manually advanced millisecond clock for headless simulation"""
+    def __init__(self, start=0):
+        self.time = start
+
+    def __call__(self):
+        return self.time
+
+    def advance(self, dt):
+        self.time += dt
+
+
+class FixedTimestep:
+    """Turns variable frame times into a whole number of fixed logic ticks.
+
+    ``rate`` ticks per second need not divide 1000: tick ``n`` ends at
+    ``n * 1000 // rate`` ms, so integer tick lengths never drift. When a
+    slow frame owes more than ``max_steps`` ticks the rest is dropped
+    rather than letting the simulation fall further behind.
+    """
+    def __init__(self, rate, max_steps=8):
+        self.rate = rate
+        self.max_steps = max_steps
+        self.ticks = 0
+        self.accumulator = 0.0
+
+    @property
+    def tick_ms(self):
+        return 1000 / self.rate
+
+    @property
+    def alpha(self):
+        """Fraction of the next tick already elapsed, for interpolation"""
+        return self.accumulator / self.tick_ms
+
+    def advance(self, frame_ms):
+        """Add a frame's duration; returns how many ticks to run now"""
+        self.accumulator += frame_ms
+        steps = int(self.accumulator // self.tick_ms)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.tick_ms
+        return steps
+
+    def next_tick(self):
+        """Count one tick and return its length in whole milliseconds"""
+        tick = self.ticks
+        self.ticks += 1
+        return (tick + 1) * 1000 // self.rate - tick * 1000 // self.rate
+
+
+class TetrisEngine:
+    """Pure-Python Tetris simulation: board, pieces, score and level.
+
+    The engine never touches pygame. Time comes from ``clock``, any callable
+    returning milliseconds; front ends pass ``pygame.time.get_ticks`` while
+    headless runs use a ``SimulationClock`` advanced through ``step``.
+    Pieces are drawn from ``rng``, a ``random.Random`` seeded with ``seed``
+    (None seeds from the OS); every game reseeds it, so a game's seed and
+    its timed input stream reproduce it exactly.
+    ``rules`` optionally overrides rule constants, see GameLogic.configure.
+    ``width`` and ``height`` size the board; ``start_game`` can change them.
+    """
+    def __init__(self, game_mode=GameMode.CLASSIC, clock=None, seed=None, rules=None,
+                 width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.clock = clock if clock is not None else SimulationClock()
+        self.listeners = []
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.draws = 0  # pieces drawn from rng since it was seeded
+
+        # Game state
+        self.state = GameState.MENU
+        self.game_mode = game_mode
+
+        # Game data
+        self.board = Board(width, height)
+        self.current_piece = None
+        self.next_piece = None
+        self.held_piece = None
+        self.can_hold = True
+
+        self.score = 0
+        self.lines_cleared = 0
+        self.level = 1
+        self.drop_speed = INITIAL_DROP_SPEED
+        self.last_drop = self.clock()
+        self.time_attack_start = None
+        self.started_at = self.last_drop
+        self.pieces_placed = 0
+        self.pending_garbage = []  # [lines, hole column] received, not yet added
+
+        self.logic = GameLogic(self)
+        self.actions = {
+            Action.MOVE_LEFT: lambda: self.logic.move(-1),
+            Action.MOVE_RIGHT: lambda: self.logic.move(1),
+            Action.SOFT_DROP: self.logic.soft_drop,
+            Action.HARD_DROP: self.logic.hard_drop,
+            Action.ROTATE: self.logic.rotate,
+            Action.HOLD: self.logic.hold_piece,
+        }
+        if rules:
+            self.logic.configure(**rules)
+
+        # Spawn first piece
+        self.logic.spawn_piece()
+
+    def add_listener(self, callback):
+        """Register ``callback(event, **data)`` for engine events"""
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self.listeners.remove(callback)
+
+    def emit(self, event, **data):
+        """Notify listeners of an event ('piece_locked', 'lines_cleared', ...)"""
+        for callback in self.listeners:
+            callback(event, **data)
+
+    def resize(self, width, height):
+        """Switch to an empty ``width`` x ``height`` board if the size differs"""
+        if (width, height) != (self.board.width, self.board.height):
+            self.board = Board(width, height)
+
+    def start_game(self, game_mode=None, seed=None, size=None):
+        """Reset the board and start playing in the given (or current) mode.
+
+        Without a ``seed`` the game's seed is drawn from the current rng;
+        ``size`` is an optional ``(width, height)`` for the new board.
+        Emits 'game_started' once the first piece is in play.
+        """
+        if game_mode is not None:
+            self.game_mode = game_mode
+        if size is not None:
+            self.resize(*size)
+        if seed is None:
+            seed = self.rng.getrandbits(32)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.draws = 0
+        self.state = GameState.PLAYING
+        self.logic.reset_game()
+        self.emit('game_started', seed=seed, game_mode=self.game_mode)
+
+    def resume(self, snapshot):
+        """Continue a saved game from ``snapshot``; emits 'game_resumed'"""
+        self.restore(snapshot)
+        self.emit('game_resumed', seed=self.seed, game_mode=self.game_mode)
+
+    def apply(self, action):
+        """Apply a single player action; ignored unless a game is in progress"""
+        if self.state == GameState.PLAYING and self.current_piece:
+            self.emit('action', action=action)
+            self.actions[action]()
+
+    def receive_garbage(self, lines, hole):
+        """Queue ``lines`` garbage rows open at column ``hole``.
+
+        They are pushed in under the stack when the next piece locks
+        without clearing a line.
+        """
+        self.pending_garbage.append([lines, hole])
+
+    def update(self):
+        """Advance gravity and game-over checks to the current clock time"""
+        self.logic.update()
+
+    def step(self, inputs=(), dt=0):
+        """Apply ``inputs`` then advance the simulation by ``dt`` milliseconds.
+
+        ``dt`` requires a clock with an ``advance`` method such as
+        ``SimulationClock``; wall clocks should pass ``dt=0``.
+        """
+        for action in inputs:
+            self.apply(action)
+        if dt:
+            self.clock.advance(dt)
+        self.update()
+
+    def snapshot(self):
+        """Complete game state as plain JSON-serializable values.
+
+        Board cells are stored as one string per row with a shape letter per
+        filled cell; the rng is stored as the number of pieces drawn since
+        seeding, which ``restore`` replays.
+        """
+        piece = self.current_piece
+        board = self.board
+        empty = '.' * board.width
+        return {
+            'tick': self.clock(),
+            'state': self.state.name,
+            'game_mode': self.game_mode.name,
+            'seed': self.seed,
+            'draws': self.draws,
+            'width': board.width,
+            'height': board.height,
+            # Most rows of a large board are empty; skip building those
+            'board': [''.join(COLOR_SHAPES.get(color, '.') if color else '.' for color in row) if bits else empty
+                      for bits, row in zip(board.rows, board.cells)],
+            'current': [piece.shape_type, piece.rotation, piece.x, piece.y] if piece else None,
+            'next': self.next_piece.shape_type if self.next_piece else None,
+            'held': self.held_piece.shape_type if self.held_piece else None,
+            'can_hold': self.can_hold,
+            'score': self.score,
+            'lines_cleared': self.lines_cleared,
+            'level': self.level,
+            'drop_speed': self.drop_speed,
+            'last_drop': self.last_drop,
+            'time_attack_start': self.time_attack_start,
+            'started_at': self.started_at,
+            'pieces_placed': self.pieces_placed,
+            'garbage': [list(entry) for entry in self.pending_garbage],
+        }
+
+    def restore(self, snapshot):
+        """Return to a state taken with ``snapshot`` (same rules).
+
+        The clock is set to the snapshot's tick when it supports it, as
+        ``SimulationClock`` does.
+        """
+        if hasattr(self.clock, 'time'):
+            self.clock.time = snapshot['tick']
+        self.state = GameState[snapshot['state']]
+        self.game_mode = GameMode[snapshot['game_mode']]
+        self.seed = snapshot['seed']
+        self.rng.seed(self.seed)
+        for _ in range(snapshot['draws']):
+            self.rng.choice(SHAPE_TYPES)
+        self.draws = snapshot['draws']
+        self.resize(snapshot.get('width', GRID_WIDTH), snapshot.get('height', GRID_HEIGHT))
+        board = self.board
+        board.reset()
+        for y, row in enumerate(snapshot['board']):
+            if row.strip('.'):
+                for x, shape_type in enumerate(row):
+                    if shape_type != '.':
+                        board.fill(x, y, CELL_COLORS[shape_type])
+        self.current_piece = None
+        if snapshot['current']:
+            shape_type, rotation, x, y = snapshot['current']
+            self.current_piece = Tetromino(shape_type, board.width)
+            self.current_piece.rotation, self.current_piece.x, self.current_piece.y = rotation, x, y
+        self.next_piece = Tetromino(snapshot['next'], board.width) if snapshot['next'] else None
+        self.held_piece = Tetromino(snapshot['held'], board.width) if snapshot['held'] else None
+        self.can_hold = snapshot['can_hold']
+        self.score = snapshot['score']
+        self.lines_cleared = snapshot['lines_cleared']
+        self.level = snapshot['level']
+        self.drop_speed = snapshot['drop_speed']
+        self.last_drop = snapshot['last_drop']
+        self.time_attack_start = snapshot['time_attack_start']
+        self.started_at = snapshot.get('started_at', snapshot['tick'])
+        self.pieces_placed = snapshot.get('pieces_placed', 0)
+        self.pending_garbage = [list(entry) for entry in snapshot.get('garbage', [])]
+
+    @property
+    def grid(self):
+        """Color plane of the board, indexed ``grid[y][x]``"""
+        return self.board.cells
+
+    @property
+    def is_over(self):
+        return self.state == GameState.GAME_OVER
+
+    def game_stats(self):
+        """Summary of the current game for score records"""
+        return {
+            'lines': self.lines_cleared,
+            'level': self.level,
+            'pieces': self.pieces_placed,
+            'duration_ms': self.clock() - self.started_at,
+            'seed': self.seed,
+            'board': f"{self.board.width}x{self.board.height}",
+        }
+
+    def time_attack_remaining(self):
+        """Milliseconds left in Time Attack, or None outside a timed game"""
+        if self.game_mode != GameMode.TIME_ATTACK or self.time_attack_start is None:
+            return None
+        elapsed = self.clock() - self.time_attack_start
+        return max(0, self.logic.time_attack_duration - elapsed)
@@ -11,4 +11,13 @@ class GameState(Enum):
 class GameMode(Enum):
     CLASSIC = 1
     TIME_ATTACK = 2
-    MARATHON = 3 
\ No newline at end of file
+    MARATHON = 3
+    AUTOPLAY = 4
+
+class Action(Enum):
+    MOVE_LEFT = 1
+    MOVE_RIGHT = 2
+    SOFT_DROP = 3
+    HARD_DROP = 4
+    ROTATE = 5
+    HOLD = 6
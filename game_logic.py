@@ -1,109 +1,174 @@
 # -*- coding: utf-8 -*-
 
-import pygame
-import random
-import json
 from constants import *
 from enums import GameState, GameMode
 from tetromino import Tetromino, create_random_tetromino
-from particle import Particle
+from placements import find_placements
 
 class GameLogic:
+    """Game rules operating on a TetrisEngine's state (no pygame dependency)"""
     def __init__(self, game):
         self.game = game
         self.tetrominos = TETROMINOS
         self.soft_drop_score = SOFT_DROP_SCORE
         self.hard_drop_score = HARD_DROP_SCORE
+        self.line_scores = LINE_SCORES
+        self.lines_per_level = LINES_PER_LEVEL
+        self.initial_drop_speed = INITIAL_DROP_SPEED
+        self.min_drop_speed = MIN_DROP_SPEED
+        self.speed_increase_per_level = SPEED_INCREASE_PER_LEVEL
+        self.time_attack_duration = TIME_ATTACK_DURATION
+        self.marathon_target_lines = MARATHON_TARGET_LINES
+        # Phase timing hook, replaced by profiler.Profiler.mark when profiling
+        self.mark = lambda name: None
+        # Ghost piece cache, valid while piece and board are unchanged
+        self.ghost_key = None
+        self.ghost = None
+    
+    def configure(self, **rules):
+        """Override rule constants by their lowercase names (``line_scores=...``).
+
+        Only the tunable attributes set in ``__init__`` are accepted; integer
+        keys of ``line_scores`` may be given as strings (as read from JSON).
+        """
+        for name, value in rules.items():
+            if name in ('game', 'tetrominos', 'ghost_key', 'ghost') or not hasattr(self, name):
+                raise ValueError(f"Unknown rule: {name}")
+            if name == 'line_scores':
+                value = {int(lines): points for lines, points in value.items()}
+            setattr(self, name, value)
     
     def spawn_piece(self):
         """Spawn a new tetromino piece"""
         if self.game.next_piece is None:
-            self.game.next_piece = create_random_tetromino()
+            self.game.next_piece = self.random_piece()
         
         self.game.current_piece = self.game.next_piece
-        self.game.next_piece = create_random_tetromino()
+        self.game.next_piece = self.random_piece()
         self.game.can_hold = True
         
         if self.is_collision(self.game.current_piece):
-            self.game.state = GameState.GAME_OVER
+            self.end_game()
+    
+    def random_piece(self):
+        """Draw the next piece from the engine's rng, counting draws for snapshots"""
+        self.game.draws += 1
+        return create_random_tetromino(self.game.rng, self.game.board.width)
     
     def is_collision(self, piece, dx=0, dy=0):
         """Check if a piece collides with walls or other pieces"""
-        for x, y in piece.get_positions():
-            new_x, new_y = x + dx, y + dy
-            if (new_x < 0 or new_x >= GRID_WIDTH or 
-                new_y >= GRID_HEIGHT or 
-                (new_y >= 0 and self.game.grid[new_y][new_x] is not None)):
-                return True
-        return False
+        return self.game.board.collides(piece.get_row_masks(), piece.x + dx, piece.y + dy)
     
     def place_piece(self):
         """Place the current piece on the grid"""
+        board = self.game.board
+        color = self.game.current_piece.color
+        placed = []
         for x, y in self.game.current_piece.get_positions():
-            if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                self.game.grid[y][x] = self.game.current_piece.color
-        
-        # Create particles
-        for x, y in self.game.current_piece.get_positions():
-            if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                for _ in range(PARTICLE_COUNT_PER_CELL):
-                    self.game.particles.append(Particle(
-                        GRID_OFFSET_X + x * CELL_SIZE + CELL_SIZE // 2,
-                        GRID_OFFSET_Y + y * CELL_SIZE + CELL_SIZE // 2,
-                        self.game.current_piece.color
-                    ))
+            if 0 <= y < board.height and 0 <= x < board.width:
+                board.fill(x, y, color)
+                placed.append((x, y))
         
-        self.clear_lines()
-        self.spawn_piece()
+        self.game.pieces_placed += 1
+        self.game.emit('piece_locked', positions=placed, color=color)
+        # Only rows the piece filled cells in can have become complete
+        if not self.clear_lines({y for _, y in placed}) and self.game.pending_garbage:
+            self.add_garbage()
+        if self.game.state != GameState.GAME_OVER:
+            self.spawn_piece()
     
-    def clear_lines(self):
-        """Clear completed lines and update score"""
-        lines_to_clear = []
-        for y in range(GRID_HEIGHT):
-            if all(cell is not None for cell in self.game.grid[y]):
-                lines_to_clear.append(y)
+    def clear_lines(self, rows=None):
+        """Clear completed lines among ``rows`` (default: all) and update score.
+
+        Listeners get one 'lines_cleared' event with the cleared rows, their
+        colors and ``top``, the first row the clear changed; rows above it
+        are untouched. Returns the number of lines cleared.
+        """
+        lines_to_clear = self.game.board.full_rows(rows)
         
         if lines_to_clear:
-            # Create explosion particles
-            for y in lines_to_clear:
-                for x in range(GRID_WIDTH):
-                    for _ in range(EXPLOSION_PARTICLE_COUNT):
-                        self.game.particles.append(Particle(
-                            GRID_OFFSET_X + x * CELL_SIZE + random.randint(0, CELL_SIZE),
-                            GRID_OFFSET_Y + y * CELL_SIZE + random.randint(0, CELL_SIZE),
-                            self.game.grid[y][x]
-                        ))
-            
-            # Remove lines
-            for y in lines_to_clear:
-                del self.game.grid[y]
-                self.game.grid.insert(0, [None for _ in range(GRID_WIDTH)])
+            # Remove lines, keeping their colors for listeners (particles)
+            cells = [self.game.grid[y] for y in lines_to_clear]
+            top = self.game.board.clear_rows(lines_to_clear)
+            self.game.emit('lines_cleared', rows=lines_to_clear, cells=cells, top=top)
             
             # Update score
             lines_count = len(lines_to_clear)
             self.game.lines_cleared += lines_count
-            self.game.score += LINE_SCORES.get(lines_count, 0) * self.game.level
+            self.game.score += self.line_scores.get(lines_count, 0) * self.game.level
             
             # Marathon bonus for finishing
-            if self.game.game_mode.name == 'MARATHON' and self.game.lines_cleared >= MARATHON_TARGET_LINES:
+            if self.game.game_mode.name == 'MARATHON' and self.game.lines_cleared >= self.marathon_target_lines:
                 self.game.score += 5000  # Bonus for winning Marathon
             
             # Update level
-            self.game.level = self.game.lines_cleared // LINES_PER_LEVEL + 1
-            self.game.drop_speed = max(MIN_DROP_SPEED, 
-                                     INITIAL_DROP_SPEED - (self.game.level - 1) * SPEED_INCREASE_PER_LEVEL)
+            self.game.level = self.game.lines_cleared // self.lines_per_level + 1
+            self.game.drop_speed = max(self.min_drop_speed, 
+                                     self.initial_drop_speed - (self.game.level - 1) * self.speed_increase_per_level)
+        return len(lines_to_clear)
+    
+    def add_garbage(self):
+        """Push all pending garbage in under the stack.
+
+        Emits 'garbage_added' per batch; cells pushed off the top end the game.
+        """
+        board = self.game.board
+        for lines, hole in self.game.pending_garbage:
+            overflow = board.add_garbage(lines, hole, GARBAGE_COLOR)
+            self.game.emit('garbage_added', lines=lines, hole=hole)
+            if overflow:
+                self.end_game()
+        self.game.pending_garbage = []
     
     def get_ghost_position(self):
         """Get the ghost piece position (where piece will land)"""
         if not self.game.current_piece:
             return None
         
-        ghost = self.game.current_piece.copy()
-        
-        while not self.is_collision(ghost, 0, 1):
-            ghost.y += 1
-        
-        return ghost
+        piece = self.game.current_piece
+        key = (piece.shape_type, piece.rotation, piece.x, piece.y, self.game.board.version)
+        if key != self.ghost_key:
+            self.ghost = piece.copy()
+            self.ghost.y += self.drop_distance(piece)
+            self.ghost_key = key
+        return self.ghost
+    
+    def drop_distance(self, piece):
+        """Number of rows a piece can fall before it lands"""
+        return self.game.board.landing_y(piece.data, piece.x, piece.y) - piece.y
+    
+    def fall_progress(self, now=None):
+        """How far (0..1) the current piece is towards its next gravity drop.
+
+        ``now`` may lie between logic ticks so renderers can interpolate the
+        falling piece; a piece resting on the stack reports 0.
+        """
+        piece = self.game.current_piece
+        if piece is None or self.is_collision(piece, 0, 1):
+            return 0.0
+        if now is None:
+            now = self.game.clock()
+        return min(1.0, max(0.0, (now - self.game.last_drop) / self.game.drop_speed))
+    
+    def get_placements(self, hold=False):
+        """Every distinct final placement of the current piece.
+
+        With ``hold=True`` the same is answered for the piece that holding
+        would bring into play (the held piece, or the next piece when the
+        hold slot is empty), starting from its spawn position.
+        """
+        board = self.game.board
+        if hold:
+            piece = self.game.held_piece or self.game.next_piece
+            if piece is None or not self.game.can_hold:
+                return []
+            piece = Tetromino(piece.shape_type, board.width)
+        else:
+            piece = self.game.current_piece
+            if piece is None:
+                return []
+        return find_placements(board.rows, board.width, piece.shape_type,
+                               piece.x, piece.y, piece.rotation, board.tops)
     
     def hold_piece(self):
         """Hold the current piece for later use (fixed logic)"""
@@ -119,44 +184,76 @@ class GameLogic:
             temp = self.game.held_piece.copy()
             self.game.held_piece = self.game.current_piece.copy()
             self.game.current_piece = temp
-            self.game.current_piece.reset_position()
             self.game.current_piece.rotation = 0
-            self.game.current_piece.shape = TETROMINOS[self.game.current_piece.shape_type][0]
+            self.game.current_piece.reset_position()
 
         self.game.can_hold = False
     
-    def update_particles(self):
-        """Update all particles"""
-        self.game.particles = [p for p in self.game.particles if p.is_alive()]
-        for particle in self.game.particles:
-            particle.update()
+    def move(self, dx):
+        """Shift the current piece horizontally if the target cells are free"""
+        if not self.is_collision(self.game.current_piece, dx, 0):
+            self.game.current_piece.x += dx
+    
+    def rotate(self):
+        """Rotate the current piece, reverting if it would collide"""
+        piece = self.game.current_piece
+        original_rotation = piece.rotation
+        piece.rotate()
+        if self.is_collision(piece):
+            piece.rotation = original_rotation
+    
+    def soft_drop(self):
+        """Move the current piece down one row"""
+        if not self.is_collision(self.game.current_piece, 0, 1):
+            self.game.current_piece.y += 1
+            self.game.score += self.soft_drop_score
+    
+    def hard_drop(self):
+        """Drop the current piece to the bottom and lock it"""
+        distance = self.drop_distance(self.game.current_piece)
+        self.game.current_piece.y += distance
+        self.game.score += distance * self.hard_drop_score
+        self.place_piece()
     
     def auto_drop(self):
-        """Handle automatic piece dropping"""
-        current_time = pygame.time.get_ticks()
-        if current_time - self.game.last_drop > self.game.drop_speed:
+        """Handle automatic piece dropping.
+
+        Drops are due every ``drop_speed`` ms after ``last_drop``; all drops
+        due by now are applied, so the outcome depends only on the clock
+        time and not on how often update is called.
+        """
+        current_time = self.game.clock()
+        while (self.game.state == GameState.PLAYING
+               and current_time - self.game.last_drop > self.game.drop_speed):
+            self.game.last_drop += self.game.drop_speed
             if not self.is_collision(self.game.current_piece, 0, 1):
                 self.game.current_piece.y += 1
             else:
                 self.place_piece()
-            self.game.last_drop = current_time
+    
+    def end_game(self):
+        """Finish the game and emit 'game_over' once"""
+        if self.game.state == GameState.GAME_OVER:
+            return
+        self.game.state = GameState.GAME_OVER
+        self.game.emit('game_over', score=self.game.score)
     
     def check_game_over_conditions(self):
         """Check if game over conditions are met based on game mode"""
-        current_time = pygame.time.get_ticks()
+        current_time = self.game.clock()
         
         if self.game.game_mode == GameMode.TIME_ATTACK:
             if self.game.time_attack_start is not None:
                 elapsed = current_time - self.game.time_attack_start
-                if elapsed >= TIME_ATTACK_DURATION:
-                    self.game.state = GameState.GAME_OVER
+                if elapsed >= self.time_attack_duration:
+                    self.end_game()
         elif self.game.game_mode == GameMode.MARATHON:
-            if self.game.lines_cleared >= MARATHON_TARGET_LINES:
-                self.game.state = GameState.GAME_OVER
+            if self.game.lines_cleared >= self.marathon_target_lines:
+                self.end_game()
     
     def reset_game(self):
         """Reset the game state"""
-        self.game.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        self.game.board.reset()
         self.game.current_piece = None
         self.game.next_piece = None
         self.game.held_piece = None
@@ -164,28 +261,21 @@ class GameLogic:
         self.game.score = 0
         self.game.lines_cleared = 0
         self.game.level = 1
-        self.game.drop_speed = INITIAL_DROP_SPEED
-        self.game.last_drop = pygame.time.get_ticks()
-        self.game.particles = []
+        self.game.drop_speed = self.initial_drop_speed
+        self.game.pieces_placed = 0
+        self.game.pending_garbage = []
+        self.game.last_drop = self.game.clock()
+        self.game.started_at = self.game.last_drop
+        if self.game.game_mode == GameMode.TIME_ATTACK:
+            self.game.time_attack_start = self.game.last_drop
+        else:
+            self.game.time_attack_start = None
         self.spawn_piece()
     
-    def load_high_scores(self):
-        """Load high scores from file"""
-        try:
-            with open('high_scores.json', 'r') as f:
-                return json.load(f)
-        except:
-            return {'classic': 0, 'time_attack': 0, 'marathon': 0}
-    
-    def save_high_scores(self):
-        """Save high scores to file"""
-        with open('high_scores.json', 'w') as f:
-            json.dump(self.game.high_scores, f)
-    
     def update(self):
         """Main update method"""
-        self.update_particles()
-        
         if self.game.state == GameState.PLAYING:
             self.auto_drop()
-            self.check_game_over_conditions() 
\ No newline at end of file
+            self.mark('drop')
+            self.check_game_over_conditions()
+            self.mark('game_over_check') 
\ No newline at end of file
@@ -1,86 +1,423 @@
 # -*- coding: utf-8 -*-
 
+import time
+LAUNCH_TIME = time.perf_counter()  # start of the --startup-profile timings
+
 import pygame
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+import argparse
+from constants import *
 from enums import GameState, GameMode
-from game_logic import GameLogic
+from engine import TetrisEngine, FixedTimestep
 from controls import InputHandler
 from renderer import Renderer
+from particle import ParticleSystem
+from bot import BeamSearchBot
+from replay import Recorder, Replay, ReplayPlayer
+from profiler import Profiler, StartupProfile
+from storage import BackgroundWriter, ScoreStore, SaveSlot
 
 class TetrisGame:
-    def __init__(self):
-        # Initialize Pygame
-        pygame.init()
-        pygame.mixer.init()
-        
+    """Pygame front end: window, input, particles and rendering over a TetrisEngine"""
+    def __init__(self, startup=None):
+        # Only the subsystems the game uses are started: no audio or
+        # joysticks, and fonts when the renderer first needs one
+        self.startup = startup
+        mark = startup.mark if startup else lambda name: None
+        pygame.display.init()
+        mark('display_init')
+
         # Set up display
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.screen = self.create_window()
         pygame.display.set_caption("Tetris - Feature Rich Edition")
         self.clock = pygame.time.Clock()
-        
-        # Game state
-        self.state = GameState.MENU
-        self.game_mode = GameMode.CLASSIC
-        
-        # Game data
-        self.grid = [[None for _ in range(10)] for _ in range(20)]
-        self.current_piece = None
-        self.next_piece = None
-        self.held_piece = None
-        self.can_hold = True
-        
-        self.score = 0
-        self.lines_cleared = 0
-        self.level = 1
-        self.drop_speed = 1000
-        self.last_drop = pygame.time.get_ticks()
-        
-        self.particles = []
-        self.high_scores = {}
-        self.time_attack_start = None  # Track start time for Time Attack
-        
+        # Also starts SDL's timer, which pygame.time.get_ticks needs
+        self.clock.tick()
+        mark('window')
+        self.timestep = FixedTimestep(LOGIC_TICK_RATE, MAX_LOGIC_STEPS_PER_FRAME)
+        self.profiler = Profiler(PROFILER_FRAMES)
+
+        # All files, replays included, are written on a background thread
+        self.writer = BackgroundWriter()
+
+        # Simulation core (spawns the first piece); its clock only runs
+        # while a game is being played
+        self.engine = TetrisEngine()
+        self.engine.add_listener(self.on_engine_event)
+        self.recorder = Recorder(self.engine, REPLAY_DIR, writer=self.writer) if RECORD_REPLAYS else None
+        mark('engine')
+
+        self.particles = ParticleSystem()
+        self.net = None  # NetClient during versus play; inputs go to it
+        self.bot = None
+        self.last_bot_move = 0
+
         # Initialize components
-        self.logic = GameLogic(self)
         self.input_handler = InputHandler(self)
         self.renderer = Renderer(self)
-        
-        # Load high scores
-        self.high_scores = self.logic.load_high_scores()
-        
-        # Spawn first piece
-        self.logic.spawn_piece()
-    
+        mark('ui')
+
+        # Leaderboards and session history are loaded once the first frame
+        # is on screen
+        self.scores = None
+        self.track_scores = True
+        self.game_recorded = True  # nothing to record before the first game
+        self.engine_mode = self.game_mode
+        self.board_size = (GRID_WIDTH, GRID_HEIGHT)  # for the next game
+
+        # The game in progress is saved whenever a piece locks
+        self.saves = SaveSlot(SAVE_FILE, self.writer) if AUTOSAVE else None
+        self.save_pending = False
+
+    def finish_startup(self):
+        """Setup the first frame does not need; runs once it is presented"""
+        if self.scores is not None:
+            return
+        if self.startup:
+            self.startup.mark('first_frame')
+        self.scores = ScoreStore(writer=self.writer)
+        if self.startup:
+            self.startup.mark('deferred_setup')
+            print(self.startup.report())
+            self.startup = None
+
+    def create_window(self):
+        """Open the game window, with vsync when configured and available"""
+        if VSYNC:
+            try:
+                return pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SCALED, vsync=1)
+            except pygame.error:
+                pass
+        return pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    @property
+    def logic(self):
+        return self.engine.logic
+
+    @property
+    def state(self):
+        return self.engine.state
+
+    @state.setter
+    def state(self, value):
+        self.engine.state = value
+
+    @property
+    def game_mode(self):
+        return self.engine.game_mode
+
+    @game_mode.setter
+    def game_mode(self, value):
+        self.engine.game_mode = value
+
+    def on_engine_event(self, event, **data):
+        """Spawn particle effects for engine events and record finished games"""
+        if event == 'game_over':
+            self.record_game('game_over')
+            if self.saves:
+                self.saves.clear()
+        elif event == 'piece_locked' and data['positions']:
+            self.save_pending = True
+            # Only cells inside the renderer's viewport get particles
+            renderer = self.renderer
+            origins = [renderer.cell_origin(x, y) for x, y in data['positions'] if renderer.in_view(x, y)]
+            if origins:
+                half = renderer.cell_size // 2
+                self.particles.spawn(
+                    [x + half for x, _ in origins],
+                    [y + half for _, y in origins],
+                    data['color'],
+                    count=PARTICLE_COUNT_PER_CELL
+                )
+        elif event == 'lines_cleared':
+            renderer = self.renderer
+            origins = []
+            colors = []
+            for y, row in zip(data['rows'], data['cells']):
+                for x, color in enumerate(row):
+                    if renderer.in_view(x, y):
+                        origins.append(renderer.cell_origin(x, y))
+                        colors.append(color)
+            if origins:
+                self.particles.spawn(
+                    [x for x, _ in origins],
+                    [y for _, y in origins],
+                    colors,
+                    count=EXPLOSION_PARTICLE_COUNT,
+                    jitter=renderer.cell_size
+                )
+
+    def update_particles(self):
+        """Update all particles"""
+        self.particles.update()
+
+    def record_game(self, outcome):
+        """Store the current game in the session log and leaderboards, once"""
+        if self.game_recorded or not self.track_scores:
+            return
+        self.game_recorded = True
+        self.scores.record_game(self.engine_mode.name.lower(), self.engine.score,
+                                leaderboard=self.on_leaderboard(), outcome=outcome,
+                                **self.engine.game_stats())
+
+    def on_leaderboard(self):
+        """Whether the current game counts for the leaderboards.
+
+        Leaderboards compare standard games; others are only logged.
+        """
+        board = self.engine.board
+        return (self.track_scores and self.engine_mode != GameMode.AUTOPLAY
+                and (board.width, board.height) == (GRID_WIDTH, GRID_HEIGHT))
+
+    def start_game(self):
+        """Start a new game in the selected mode"""
+        # A game left through the menu still counts
+        self.record_game('abandoned')
+        if self.saves:
+            self.saves.clear()
+        self.save_pending = False
+        self.game_recorded = False
+        self.engine_mode = self.game_mode  # the menu may change game_mode later
+        self.particles.clear()
+        self.input_handler.reset()
+        self.engine.start_game(size=self.board_size)
+        if self.game_mode == GameMode.AUTOPLAY and self.bot is None:
+            self.bot = BeamSearchBot(beam_width=AUTOPLAY_BEAM_WIDTH, depth=AUTOPLAY_DEPTH)
+
+    def cycle_board_size(self, step):
+        """Select the previous or next of BOARD_SIZES for the next game"""
+        sizes = BOARD_SIZES if self.board_size in BOARD_SIZES else [self.board_size] + BOARD_SIZES
+        self.board_size = sizes[(sizes.index(self.board_size) + step) % len(sizes)]
+
+    def save_game(self):
+        """Save the game in progress (not autoplay games)"""
+        self.save_pending = False
+        if self.saves and not self.game_recorded and self.engine_mode != GameMode.AUTOPLAY:
+            self.saves.save(self.engine.snapshot())
+
+    def resume_game(self):
+        """Continue the saved game, if there is one, paused. Returns whether it did"""
+        snapshot = self.saves.load() if self.saves else None
+        if snapshot is None:
+            return False
+        # The save may have been taken from the menu; resume into play
+        self.engine.resume(dict(snapshot, state=GameState.PLAYING.name))
+        self.game_recorded = False
+        self.engine_mode = self.game_mode
+        self.particles.clear()
+        self.input_handler.reset()
+        self.state = GameState.PAUSED
+        return True
+
+    def toggle_profiler(self):
+        """Turn frame profiling and its overlay on or off"""
+        self.profiler.toggle()
+        self.engine.logic.mark = self.profiler.mark
+        self.renderer.show_profiler = self.profiler.enabled
+
+    def export_profile(self):
+        """Write the profiler's recorded frames to a timestamped CSV file"""
+        return self.profiler.export_csv(time.strftime('profile_%Y%m%d_%H%M%S.csv'))
+
+    def update_autoplay(self):
+        """Let the bot place a piece when autoplay is running"""
+        if self.game_mode != GameMode.AUTOPLAY or self.state != GameState.PLAYING:
+            return
+        current_time = pygame.time.get_ticks()
+        if current_time - self.last_bot_move >= AUTOPLAY_PIECE_DELAY:
+            self.bot.play_piece(self.engine)
+            self.last_bot_move = current_time
+
+    def step_logic(self, now=None):
+        """Run one fixed logic tick: game time, gravity, input and particles.
+
+        ``now`` is the wall time (pygame ticks) the tick stands for; input
+        due by then is applied after gravity, as replays expect.
+        """
+        tick = self.timestep.ticks
+        dt = self.timestep.next_tick()
+        # Game time only passes while playing, so pauses don't count
+        if self.state == GameState.PLAYING:
+            self.engine.clock.advance(dt)
+        self.engine.update()
+        if now is not None:
+            self.input_handler.update(now)
+            self.profiler.mark('input')
+        if (tick + 1) * PARTICLE_UPDATE_RATE // LOGIC_TICK_RATE > tick * PARTICLE_UPDATE_RATE // LOGIC_TICK_RATE:
+            self.update_particles()
+            self.profiler.mark('particles')
+
+    def render_time(self):
+        """Game time interpolated between the last and the next logic tick"""
+        if self.state != GameState.PLAYING:
+            return self.engine.clock()
+        return self.engine.clock() + self.timestep.alpha * self.timestep.tick_ms
+
     def run(self):
         """Main game loop"""
         running = True
-        
+
+        profiler = self.profiler
         while running:
+            profiler.begin_frame()
+            frame_ms = self.clock.tick(RENDER_FPS)
+            profiler.mark('wait')
+
             # Handle events
             running = self.input_handler.handle_events()
-            
+            profiler.mark('handle_events')
+
             # Handle continuous input
             self.input_handler.handle_continuous_input()
-            
-            # Update game logic
-            self.logic.update()
-            
+            profiler.mark('handle_continuous_input')
+
+            # Update game logic at the fixed tick rate. This frame's ticks
+            # stand for evenly spaced times ending now, and each applies the
+            # input whose event time it has reached
+            self.update_autoplay()
+            profiler.mark('autoplay')
+            now = pygame.time.get_ticks()
+            steps = self.timestep.advance(frame_ms)
+            for step in range(steps):
+                self.step_logic(now - (steps - 1 - step) * self.timestep.tick_ms)
+            self.input_handler.flush(now)
+            profiler.mark('input')
+            if self.save_pending:
+                self.save_game()
+            profiler.mark('save')
+
             # Render everything
             self.renderer.render()
-            
+
             # Update display
-            pygame.display.flip()
-            
-            # Control frame rate
-            self.clock.tick(60)
-        
-        # Save high scores before quitting
-        mode_key = self.game_mode.name.lower()
-        if self.score > self.high_scores.get(mode_key, 0):
-            self.high_scores[mode_key] = self.score
-            self.logic.save_high_scores()
-        
+            self.renderer.present()
+            profiler.mark('present')
+            self.finish_startup()
+            profiler.end_frame()
+
+        if self.recorder:
+            self.recorder.close()
+
+        # Keep a game still in progress to resume next time (it is recorded
+        # when it ends) and finish pending writes
+        if self.saves and not self.game_recorded and self.engine_mode != GameMode.AUTOPLAY:
+            self.save_game()
+        else:
+            self.record_game('quit')
+        self.scores.close()
+
+        pygame.quit()
+
+    def run_replay(self, path):
+        """Play a replay at real speed; LEFT/RIGHT seek, P pauses, ESC quits"""
+        if self.recorder:
+            self.recorder.detach()
+            self.recorder = None
+        # Replayed games are not new scores or saves
+        self.track_scores = False
+        self.saves = None
+        player = ReplayPlayer(Replay.load(path), self.engine)
+        paused = False
+        running = True
+
+        while running:
+            dt = self.clock.tick(60)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+                    paused = not paused
+                elif event.type == pygame.KEYDOWN and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    step = REPLAY_SEEK_STEP if event.key == pygame.K_RIGHT else -REPLAY_SEEK_STEP
+                    player.seek(max(player.replay.start_tick, player.time + step))
+                    self.particles.clear()
+            if not paused and not player.finished:
+                player.run_until(player.time + dt)
+
+            self.update_particles()
+            self.renderer.render()
+            self.renderer.present()
+            self.finish_startup()
+
+        self.scores.close()
+        pygame.quit()
+
+    def run_versus(self, host, port, name):
+        """Play a versus match on a netplay server; ESC quits.
+
+        The engine mirrors this player's board from the server, so the loop
+        only turns keys into inputs for the client and polls it; neither
+        waits on the network.
+        """
+        # Imported here: asyncio would add to every game's startup time
+        from netplay import NetClient
+        if self.recorder:
+            self.recorder.detach()
+            self.recorder = None
+        self.track_scores = False
+        self.saves = None
+        self.net = client = NetClient(host, port, name, self.engine)
+        client.start()
+        running = True
+
+        while running:
+            self.clock.tick(RENDER_FPS)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key in self.input_handler.key_actions:
+                    self.input_handler.handle_keydown(event.key, self.input_handler.event_time(event))
+                elif event.type == pygame.KEYUP:
+                    self.input_handler.handle_keyup(event.key, self.input_handler.event_time(event))
+            self.input_handler.update(pygame.time.get_ticks())
+            client.poll()
+
+            if client.status in ('playing', 'finished'):
+                self.renderer.render_game()
+                self.renderer.draw_versus(client)
+            else:
+                self.renderer.render_versus_lobby(client)
+            self.renderer.present()
+            self.finish_startup()
+
+        client.close()
+        self.scores.close()
         pygame.quit()
 
+def board_size(text):
+    """argparse type for ``WxH`` board sizes"""
+    try:
+        width, height = (int(n) for n in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, e.g. 40x200, not {text!r}")
+    if width < MIN_BOARD_WIDTH or height < MIN_BOARD_HEIGHT:
+        raise argparse.ArgumentTypeError(
+            f"board must be at least {MIN_BOARD_WIDTH}x{MIN_BOARD_HEIGHT} for pieces to spawn")
+    return width, height
+
 if __name__ == "__main__":
-    game = TetrisGame()
-    game.run() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Tetris - Feature Rich Edition")
+    parser.add_argument('--replay', help="play back a recorded replay file")
+    parser.add_argument('--new', action='store_true', help="start at the menu instead of resuming a saved game")
+    parser.add_argument('--board', metavar='WxH', type=board_size, help="board size for new games, e.g. 40x200")
+    parser.add_argument('--versus', metavar='HOST:PORT', help="join a versus server (see netplay.py)")
+    parser.add_argument('--name', default='player', help="your name in versus play")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="print a timing breakdown from launch to the first presented frame")
+    args = parser.parse_args()
+    startup = StartupProfile(LAUNCH_TIME) if args.startup_profile else None
+    if startup:
+        startup.mark('imports')
+    game = TetrisGame(startup)
+    if args.board:
+        game.board_size = args.board
+    if args.replay:
+        game.run_replay(args.replay)
+    elif args.versus:
+        from netplay import parse_address
+        game.run_versus(*parse_address(args.versus), args.name)
+    else:
+        if not args.new:
+            game.resume_game()
+        if startup:
+            startup.mark('resume')
+        game.run()
@@ -0,0 +1,715 @@
+# -*- coding: utf-8 -*-
+
+"""Local versus play: an asyncio match server and a non-blocking client.
+
+The server runs every player's TetrisEngine. Clients send only their inputs
+and mirror the boards from the state the server streams back. Messages are
+JSON lines::
+
+    client -> server
+        {"t": "hello", "name": ...}
+        {"t": "input", "seq": n, "a": Action value, "at": client ms}
+        {"t": "ack", "tick": tick}         newest state message received
+    server -> client
+        {"t": "welcome", "id": ..., "width": ..., "height": ..., "players": needed}
+        {"t": "lobby", "players": {id: name}}
+        {"t": "start", "seed": ..., "players": {id: name}}
+        {"t": "state", "tick": ..., "boards": {id: delta}, "input": [seq, at]}
+        {"t": "end", "results": [[id, place, score, lines], ...]}
+
+A board delta has ``r``, ``[y, row]`` pairs for the rows that changed after
+the client's last acknowledged tick (rows in TetrisEngine.snapshot's
+format), and ``m``, the piece, score and other small fields, if those
+changed. Row contents are absolute, so a delta is right for any state the
+client can hold between its acknowledged tick and now, and a tick the
+server skips (a client that stops reading is held back) loses nothing.
+``input`` echoes the newest input the server applied; the client times it
+to measure end-to-end latency.
+
+Clearing two or more lines at once sends garbage (VERSUS_GARBAGE). It first
+cancels the sender's own pending garbage, and the rest goes to the
+opponents still playing, in turn.
+
+    python netplay.py serve --players 2                  # match server on localhost
+    python main.py --versus 127.0.0.1:7777 --name ann    # join from the game
+    python netplay.py bots --players 4 --seconds 30      # server plus headless bot clients
+    python netplay.py bots --players 2 --connect 127.0.0.1:7777
+"""
+
+import argparse
+import asyncio
+import json
+import queue
+import random
+import threading
+import time
+from constants import *
+from enums import GameMode, GameState, Action
+from engine import TetrisEngine, CELL_COLORS, COLOR_SHAPES
+from tetromino import Tetromino
+from bot import BeamSearchBot
+from profiler import LatencyHistogram
+
+def encode(message):
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+def encode_row(colors):
+    return ''.join(COLOR_SHAPES.get(color, '.') if color else '.' for color in colors)
+
+def decode_row(text):
+    return [CELL_COLORS[letter] if letter != '.' else None for letter in text]
+
+def is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def parse_address(text):
+    """``host:port``, ``host`` or ``:port`` -> (host, port)"""
+    host, _, port = text.rpartition(':') if ':' in text else (text, '', '')
+    return host or VERSUS_HOST, int(port) if port else VERSUS_PORT
+
+class Meter:
+    """Bytes and messages through one side of a connection.
+
+    ``rate`` is bytes per second over the last completed one-second window.
+    """
+    def __init__(self, window=1.0):
+        self.window = window
+        self.total = 0
+        self.messages = 0
+        self.window_start = time.monotonic()
+        self.window_bytes = 0
+        self.last_rate = 0.0
+
+    def add(self, size):
+        now = time.monotonic()
+        elapsed = now - self.window_start
+        if elapsed >= self.window:
+            self.last_rate = self.window_bytes / elapsed
+            self.window_start = now
+            self.window_bytes = 0
+        self.window_bytes += size
+        self.total += size
+        self.messages += 1
+
+    @property
+    def rate(self):
+        # A window that has not closed for a while means traffic stopped
+        return self.last_rate if time.monotonic() - self.window_start < 2 * self.window else 0.0
+
+def board_meta(engine):
+    """The fields of a board besides its rows, as sent to clients"""
+    piece = engine.current_piece
+    return {
+        'p': [piece.shape_type, piece.rotation, piece.x, piece.y] if piece else None,
+        'n': engine.next_piece.shape_type if engine.next_piece else None,
+        'h': engine.held_piece.shape_type if engine.held_piece else None,
+        'c': engine.can_hold,
+        's': engine.score,
+        'l': engine.lines_cleared,
+        'v': engine.level,
+        'd': engine.drop_speed,
+        'k': engine.pieces_placed,
+        'g': sum(lines for lines, _ in engine.pending_garbage),
+        'o': engine.is_over,
+    }
+
+def mirror_piece(piece, shape_type, width):
+    """``piece`` if it has ``shape_type``, else a new one (None for no shape)"""
+    if shape_type is None:
+        return None
+    if piece is None or piece.shape_type != shape_type:
+        piece = Tetromino(shape_type, width)
+    return piece
+
+def apply_delta(engine, delta):
+    """Bring a mirror engine up to date with a board delta"""
+    board = engine.board
+    for y, row in delta.get('r', ()):
+        board.set_row(y, decode_row(row))
+    meta = delta.get('m')
+    if meta is None:
+        return
+    if meta['p']:
+        shape_type, rotation, x, y = meta['p']
+        piece = engine.current_piece = mirror_piece(engine.current_piece, shape_type, board.width)
+        piece.rotation, piece.x, piece.y = rotation, x, y
+    else:
+        engine.current_piece = None
+    engine.next_piece = mirror_piece(engine.next_piece, meta['n'], board.width)
+    engine.held_piece = mirror_piece(engine.held_piece, meta['h'], board.width)
+    engine.can_hold = meta['c']
+    engine.score = meta['s']
+    engine.lines_cleared = meta['l']
+    engine.level = meta['v']
+    engine.drop_speed = meta['d']
+    engine.pieces_placed = meta['k']
+    engine.state = GameState.GAME_OVER if meta['o'] else GameState.PLAYING
+
+class PlayerSlot:
+    """A connected player: connection, authoritative engine and sync state.
+
+    ``row_ticks[y]`` is the tick row ``y`` last changed, ``meta_tick`` the
+    same for the other fields and ``changed_tick`` the latest of them all,
+    so a delta after any tick is a scan of ``row_ticks``.
+    """
+    def __init__(self, player_id, name, writer, width, height):
+        self.id = player_id
+        self.name = name
+        self.writer = writer
+        self.engine = TetrisEngine(GameMode.CLASSIC, width=width, height=height)
+        self.empty_row = '.' * width
+        self.rows = [self.empty_row] * height
+        self.row_ticks = [0] * height
+        self.version = None
+        self.meta = None
+        self.meta_tick = 0
+        self.changed_tick = 0
+        self.acked = -1  # newest tick the client has confirmed
+        self.input = None  # [seq, client ms] of the newest input applied
+        self.input_echoed = None
+        self.place = None  # finishing place in the current match
+        self.garbage_sent = 0
+        self.sent = Meter()
+        self.received = Meter()
+        self.rtt = LatencyHistogram()
+        self.sent_ticks = {}  # tick -> monotonic time, until acknowledged
+
+    def track_changes(self, tick):
+        """Stamp the rows and fields that changed since the last tick with ``tick``"""
+        board = self.engine.board
+        if board.version != self.version:
+            self.version = board.version
+            rows, row_ticks = self.rows, self.row_ticks
+            for y, (bits, colors) in enumerate(zip(board.rows, board.cells)):
+                row = encode_row(colors) if bits else self.empty_row
+                if row != rows[y]:
+                    rows[y] = row
+                    row_ticks[y] = tick
+                    self.changed_tick = tick
+        meta = board_meta(self.engine)
+        if meta != self.meta:
+            self.meta = meta
+            self.meta_tick = self.changed_tick = tick
+
+    def delta(self, base):
+        """Everything that changed after tick ``base``, as a board delta"""
+        delta = {}
+        rows = [[y, row] for y, (row, tick) in enumerate(zip(self.rows, self.row_ticks)) if tick > base]
+        if rows:
+            delta['r'] = rows
+        if self.meta_tick > base:
+            delta['m'] = self.meta
+        return delta
+
+    def stats(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'sent_bytes': self.sent.total,
+            'sent_messages': self.sent.messages,
+            'sent_rate': self.sent.rate,
+            'received_bytes': self.received.total,
+            'received_rate': self.received.rate,
+            'garbage_sent': self.garbage_sent,
+            'rtt': self.rtt.summary(),
+        }
+
+class VersusServer:
+    """Runs versus matches for clients connecting to ``host:port``.
+
+    A match starts once ``players`` clients have joined. Every board gets
+    the same seed, so everyone is dealt the same pieces. Inputs are applied
+    as they arrive; each tick the server advances every engine to the match
+    time and sends each client the deltas of all boards.
+    """
+    def __init__(self, host=VERSUS_HOST, port=VERSUS_PORT, players=VERSUS_PLAYERS,
+                 width=GRID_WIDTH, height=GRID_HEIGHT, tick_rate=VERSUS_TICK_RATE, seed=None):
+        self.host = host
+        self.port = port
+        self.players = players
+        self.width = width
+        self.height = height
+        self.tick_rate = tick_rate
+        self.rng = random.Random(seed)
+        self.slots = {}  # player id -> PlayerSlot
+        self.next_id = 0
+        self.tick = 0
+        self.playing = False
+        self.match_start = 0.0
+        self.match_size = 0
+        self.alive = 0
+        self.next_match = 0.0  # monotonic time the next match may start
+        self.matches = 0
+        self.target_turn = 0
+        self.server = None
+        self.ticker = None
+
+    async def start(self):
+        """Listen and start ticking; port 0 picks a free port"""
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ticker = asyncio.create_task(self.run_ticks())
+
+    async def close(self):
+        self.ticker.cancel()
+        self.server.close()
+        for slot in list(self.slots.values()):
+            slot.writer.close()
+        await self.server.wait_closed()
+
+    def names(self):
+        return {slot.id: slot.name for slot in self.slots.values()}
+
+    def send(self, slot, message):
+        if slot.writer.is_closing():
+            return
+        data = encode(message)
+        slot.writer.write(data)
+        slot.sent.add(len(data))
+
+    def broadcast(self, message):
+        for slot in list(self.slots.values()):
+            self.send(slot, message)
+
+    async def handle_client(self, reader, writer):
+        slot = None
+        try:
+            line = await reader.readline()
+            hello = json.loads(line) if line else {}
+            if not isinstance(hello, dict) or hello.get('t') != 'hello' or self.playing or len(self.slots) >= self.players:
+                writer.write(encode({'t': 'error', 'message': "match in progress or full"}))
+                return
+            slot = PlayerSlot(self.next_id, str(hello.get('name', 'player'))[:16], writer,
+                              self.width, self.height)
+            self.next_id += 1
+            slot.received.add(len(line))
+            slot.engine.add_listener(lambda event, **data: self.on_engine_event(slot, event, **data))
+            self.slots[slot.id] = slot
+            self.send(slot, {'t': 'welcome', 'id': slot.id, 'width': self.width, 'height': self.height,
+                             'players': self.players})
+            self.broadcast({'t': 'lobby', 'players': self.names()})
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                slot.received.add(len(line))
+                self.receive(slot, json.loads(line))
+        except (ConnectionError, ValueError, KeyError, AttributeError, TypeError):
+            # A malformed message drops the client, like a lost connection
+            pass
+        finally:
+            if slot is not None:
+                self.disconnect(slot)
+            writer.close()
+
+    def receive(self, slot, message):
+        """Handle one client message; raises ValueError if it is malformed"""
+        if not isinstance(message, dict):
+            raise ValueError("message is not an object")
+        kind = message.get('t')
+        if kind == 'input':
+            seq, at = message['seq'], message['at']
+            if not (is_int(seq) and is_int(at)):
+                raise ValueError("input seq and at must be integers")
+            if self.playing:
+                slot.engine.apply(Action(message['a']))
+            # Echoed to every client
+            slot.input = [seq, at]
+        elif kind == 'ack':
+            tick = message['tick']
+            if not is_int(tick):
+                raise ValueError("ack tick must be an integer")
+            if tick > slot.acked:
+                slot.acked = tick
+                sent_at = slot.sent_ticks.get(tick)
+                if sent_at is not None:
+                    slot.rtt.record((time.monotonic() - sent_at) * 1000)
+                slot.sent_ticks = {t: at for t, at in slot.sent_ticks.items() if t > tick}
+
+    def disconnect(self, slot):
+        """A player who leaves a match is out; the lobby is told either way"""
+        del self.slots[slot.id]
+        if self.playing and slot.place is None:
+            slot.place = self.alive
+            self.alive -= 1
+        self.broadcast({'t': 'lobby', 'players': self.names()})
+
+    def on_engine_event(self, slot, event, **data):
+        if not self.playing:
+            return
+        if event == 'lines_cleared':
+            lines = VERSUS_GARBAGE.get(len(data['rows']), 0)
+            # Garbage cancels the sender's own pending garbage first
+            pending = slot.engine.pending_garbage
+            while lines and pending:
+                cancelled = min(lines, pending[0][0])
+                pending[0][0] -= cancelled
+                lines -= cancelled
+                if not pending[0][0]:
+                    pending.pop(0)
+            target = self.next_target(slot) if lines else None
+            if target is not None:
+                target.engine.receive_garbage(lines, self.rng.randrange(self.width))
+                slot.garbage_sent += lines
+        elif event == 'game_over' and slot.place is None:
+            slot.place = self.alive
+            self.alive -= 1
+
+    def next_target(self, sender):
+        """The next opponent still playing, in rotation"""
+        targets = [slot for slot in self.slots.values() if slot is not sender and slot.place is None]
+        if not targets:
+            return None
+        self.target_turn += 1
+        return targets[self.target_turn % len(targets)]
+
+    def start_match(self):
+        seed = self.rng.getrandbits(32)
+        for slot in self.slots.values():
+            slot.place = None
+            slot.engine.clock.time = 0
+            slot.engine.start_game(GameMode.CLASSIC, seed)
+        self.playing = True
+        self.match_start = time.monotonic()
+        self.match_size = self.alive = len(self.slots)
+        self.matches += 1
+        self.broadcast({'t': 'start', 'seed': seed, 'players': self.names()})
+
+    def end_match(self):
+        """Place the players still in (first) and announce the results"""
+        for slot in self.slots.values():
+            if slot.place is None:
+                slot.place = 1
+                slot.engine.logic.end_game()
+        self.playing = False
+        self.next_match = time.monotonic() + VERSUS_RESTART_DELAY / 1000
+        # Final boards first, so clients see how the match ended
+        self.sync_all()
+        results = sorted([slot.id, slot.place, slot.engine.score, slot.engine.lines_cleared]
+                         for slot in self.slots.values())
+        self.broadcast({'t': 'end', 'results': results})
+
+    async def run_ticks(self):
+        interval = 1 / self.tick_rate
+        next_time = time.monotonic()
+        while True:
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Fell behind: carry on from now rather than bursting
+                next_time = time.monotonic()
+            self.step()
+
+    def step(self):
+        """One server tick: start, advance or end the match, then sync clients"""
+        if not self.playing:
+            if len(self.slots) >= self.players and time.monotonic() >= self.next_match:
+                self.start_match()
+            return
+        now = int((time.monotonic() - self.match_start) * 1000)
+        for slot in list(self.slots.values()):
+            slot.engine.clock.time = now
+            slot.engine.update()
+        if self.alive <= (1 if self.match_size > 1 else 0):
+            self.end_match()
+        else:
+            self.sync_all()
+
+    def sync_all(self):
+        self.tick += 1
+        for slot in self.slots.values():
+            slot.track_changes(self.tick)
+        for client in list(self.slots.values()):
+            self.sync(client)
+
+    def sync(self, client):
+        """Send ``client`` every change after the tick it last acknowledged"""
+        if client.writer.transport.get_write_buffer_size() > VERSUS_SEND_BUFFER:
+            return  # not reading; the next delta will cover this tick
+        base = client.acked
+        boards = {slot.id: slot.delta(base) for slot in self.slots.values() if slot.changed_tick > base}
+        message = {'t': 'state', 'tick': self.tick, 'boards': boards}
+        if client.input != client.input_echoed:
+            message['input'] = client.input_echoed = client.input
+        elif not boards:
+            return
+        client.sent_ticks[self.tick] = time.monotonic()
+        self.send(client, message)
+
+    def stats(self):
+        """Bandwidth and round-trip time per connected client"""
+        return [slot.stats() for slot in self.slots.values()]
+
+class NetClient:
+    """Versus client: sends inputs and mirrors every board from server deltas.
+
+    The connection runs on an asyncio loop: its own, in a background thread
+    (``start``, for the pygame frame loop), or the caller's (``connect``).
+    ``send_input`` and ``poll`` never wait on the network. Inputs are handed
+    to the loop, and received messages queue up until ``poll`` applies them
+    to ``engine`` (this player) and ``opponents``.
+    """
+    def __init__(self, host=VERSUS_HOST, port=VERSUS_PORT, name='player', engine=None):
+        self.host = host
+        self.port = port
+        self.name = name
+        self.engine = engine if engine is not None else TetrisEngine()
+        self.player_id = None
+        self.players = {}  # player id -> name
+        self.opponents = {}  # player id -> mirror TetrisEngine
+        self.garbage = {}  # player id -> pending garbage rows
+        self.needed = 0
+        self.status = 'connecting'  # then lobby, playing, finished, closed
+        self.matches = 0
+        self.results = None
+        self.error = None
+        self.inbox = queue.SimpleQueue()
+        self.loop = None
+        self.writer = None
+        self.thread = None
+        self.sent = Meter()
+        self.received = Meter()
+        self.latency = LatencyHistogram()
+        self.seq = 0
+        self.echoed = 0
+
+    def start(self):
+        """Connect from a background thread running its own event loop"""
+        self.thread = threading.Thread(target=asyncio.run, args=(self.connect(),), name='NetClient', daemon=True)
+        self.thread.start()
+
+    async def connect(self):
+        """Connect and receive until the connection closes"""
+        self.loop = asyncio.get_running_loop()
+        try:
+            reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.write({'t': 'hello', 'name': self.name})
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.received.add(len(line))
+                message = json.loads(line)
+                if message['t'] == 'state':
+                    # Acknowledged on arrival; poll applies queued messages in order
+                    self.write({'t': 'ack', 'tick': message['tick']})
+                self.inbox.put(message)
+        except (OSError, ValueError) as error:
+            self.inbox.put({'t': 'error', 'message': str(error)})
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+            self.inbox.put({'t': 'closed'})
+
+    def write(self, message):
+        if self.writer is None or self.writer.is_closing():
+            return
+        data = encode(message)
+        self.writer.write(data)
+        self.sent.add(len(data))
+
+    def call(self, function, *args):
+        """Run ``function`` on the connection's loop, from any thread"""
+        if self.loop is not None:
+            try:
+                self.loop.call_soon_threadsafe(function, *args)
+            except RuntimeError:
+                pass  # the loop has already stopped
+
+    def send_input(self, action):
+        """Send a player action to the server; returns at once"""
+        self.seq += 1
+        self.call(self.write, {'t': 'input', 'seq': self.seq, 'a': action.value,
+                               'at': round(time.perf_counter() * 1000, 3)})
+
+    def close(self):
+        """Disconnect; the background thread, if any, ends shortly after"""
+        if self.writer is not None:
+            self.call(self.writer.close)
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+
+    def poll(self):
+        """Apply every message received since the last poll"""
+        while True:
+            try:
+                message = self.inbox.get_nowait()
+            except queue.Empty:
+                return
+            self.handle(message)
+
+    def engines(self):
+        return [self.engine] + list(self.opponents.values())
+
+    def handle(self, message):
+        kind = message['t']
+        if kind == 'state':
+            for player_id, delta in message['boards'].items():
+                player_id = int(player_id)
+                engine = self.engine if player_id == self.player_id else self.opponents.get(player_id)
+                if engine is not None:
+                    apply_delta(engine, delta)
+                    if 'm' in delta:
+                        self.garbage[player_id] = delta['m']['g']
+            echo = message.get('input')
+            if echo and echo[0] > self.echoed:
+                # Input sent, applied by the server and now visible here
+                self.echoed = echo[0]
+                self.latency.record(time.perf_counter() * 1000 - echo[1])
+        elif kind == 'welcome':
+            self.player_id = message['id']
+            self.needed = message['players']
+            self.engine.resize(message['width'], message['height'])
+            self.status = 'lobby'
+        elif kind == 'lobby':
+            self.players = {int(player_id): name for player_id, name in message['players'].items()}
+        elif kind == 'start':
+            self.players = {int(player_id): name for player_id, name in message['players'].items()}
+            board = self.engine.board
+            self.opponents = {player_id: TetrisEngine(width=board.width, height=board.height)
+                              for player_id in self.players if player_id != self.player_id}
+            for engine in self.engines():
+                engine.board.reset()
+                engine.state = GameState.PLAYING
+            self.garbage = {}
+            self.results = None
+            self.matches += 1
+            self.status = 'playing'
+        elif kind == 'end':
+            self.results = message['results']
+            for engine in self.engines():
+                engine.state = GameState.GAME_OVER
+            self.status = 'finished'
+        elif kind == 'error':
+            self.error = message['message']
+        elif kind == 'closed':
+            self.status = 'closed'
+
+    def place(self):
+        """This player's place in the last finished match, or None"""
+        for player_id, place, _, _ in self.results or ():
+            if player_id == self.player_id:
+                return place
+        return None
+
+    def stats(self):
+        """Bandwidth both ways and end-to-end input latency"""
+        return {
+            'sent_bytes': self.sent.total,
+            'sent_rate': self.sent.rate,
+            'received_bytes': self.received.total,
+            'received_messages': self.received.messages,
+            'received_rate': self.received.rate,
+            'latency': self.latency.summary(),
+        }
+
+async def play_bot(client, piece_delay=AUTOPLAY_PIECE_DELAY, beam_width=SPECTATOR_BEAM_WIDTH):
+    """Play ``client``'s games with the beam-search bot until it disconnects.
+
+    The bot plans on the mirrored board, so it plays with the same view and
+    network delay a person would.
+    """
+    bot = BeamSearchBot(beam_width=beam_width, depth=1)
+    planned = None
+    next_move = 0.0
+    while client.status != 'closed':
+        # Polls like a fast frame loop, also while waiting to move
+        client.poll()
+        engine = client.engine
+        piece = (client.matches, engine.pieces_placed)
+        if (client.status == 'playing' and engine.state == GameState.PLAYING
+                and engine.current_piece is not None and piece != planned
+                and time.monotonic() >= next_move):
+            planned = piece
+            move = bot.choose(engine)
+            actions = bot.plan_actions(engine, *move) if move else None
+            for action in actions or [Action.HARD_DROP]:
+                client.send_input(action)
+            next_move = time.monotonic() + piece_delay / 1000
+        await asyncio.sleep(0.004)
+
+async def run_bots(players, seconds, address=None, piece_delay=AUTOPLAY_PIECE_DELAY):
+    """Play ``players`` headless bot clients against each other for ``seconds``.
+
+    Without an ``address`` a server is started in the same event loop.
+    Returns the clients and the server's per-client stats (if local).
+    """
+    server = None
+    if address is None:
+        server = VersusServer(port=0, players=players)
+        await server.start()
+        address = (server.host, server.port)
+    clients = [NetClient(*address, name=f"bot{i}") for i in range(players)]
+    tasks = [asyncio.create_task(client.connect()) for client in clients]
+    tasks += [asyncio.create_task(play_bot(client, piece_delay)) for client in clients]
+    await asyncio.sleep(seconds)
+    server_stats = server.stats() if server else None
+    for client in clients:
+        client.close()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if server:
+        await server.close()
+    return clients, server_stats
+
+def format_rate(bytes_per_second):
+    return f"{bytes_per_second / 1024:.2f} KB/s"
+
+def print_server_stats(stats):
+    for row in stats:
+        rtt = row['rtt']
+        print(f"  {row['name']:<10} out {row['sent_bytes'] / 1024:8.1f} KB ({format_rate(row['sent_rate'])}, "
+              f"{row['sent_messages']} messages)  in {row['received_bytes'] / 1024:6.1f} KB "
+              f"({format_rate(row['received_rate'])})  rtt p50 {rtt['p50_ms']:.0f} / p95 {rtt['p95_ms']:.0f} ms"
+              f"  garbage sent {row['garbage_sent']}")
+
+async def serve(args):
+    host, port = parse_address(args.address)
+    server = VersusServer(host, port, args.players, seed=args.seed)
+    await server.start()
+    print(f"Versus server on {server.host}:{server.port}, {args.players} players per match")
+    while True:
+        await asyncio.sleep(args.stats)
+        if server.slots:
+            print(f"Tick {server.tick}, match {server.matches}{' (playing)' if server.playing else ''}:")
+            print_server_stats(server.stats())
+
+def main():
+    parser = argparse.ArgumentParser(description="Local versus play over TCP")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="run a match server")
+    serve_parser.add_argument('--address', default=f"{VERSUS_HOST}:{VERSUS_PORT}", help="host:port to listen on")
+    serve_parser.add_argument('--players', type=int, default=VERSUS_PLAYERS, help="players per match")
+    serve_parser.add_argument('--seed', type=int, help="seed for match seeds and garbage holes")
+    serve_parser.add_argument('--stats', type=float, default=10, help="seconds between client stats")
+    bots_parser = commands.add_parser('bots', help="play headless bot clients against each other")
+    bots_parser.add_argument('--players', type=int, default=4)
+    bots_parser.add_argument('--seconds', type=float, default=30)
+    bots_parser.add_argument('--connect', help="host:port of a running server (default: start one here)")
+    bots_parser.add_argument('--piece-delay', type=int, default=AUTOPLAY_PIECE_DELAY,
+                             help="milliseconds each bot waits after placing a piece")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+        return
+    address = parse_address(args.connect) if args.connect else None
+    clients, server_stats = asyncio.run(run_bots(args.players, args.seconds, address, args.piece_delay))
+    print(f"{len(clients)} bot clients, {args.seconds:.0f}s:")
+    for client in clients:
+        stats = client.stats()
+        latency = stats['latency']
+        print(f"  {client.name:<10} matches {client.matches}, place {client.place()}, score {client.engine.score:,}  "
+              f"down {stats['received_bytes'] / 1024:.1f} KB ({stats['received_bytes'] / args.seconds / 1024:.2f} KB/s)  "
+              f"up {stats['sent_bytes'] / 1024:.1f} KB  latency mean {latency['mean_ms']:.1f} / "
+              f"p95 {latency['p95_ms']:.0f} / max {latency['max_ms']:.0f} ms ({latency['count']} inputs)")
+    if server_stats:
+        print("Server:")
+        print_server_stats(server_stats)
+
+if __name__ == "__main__":
+    main()
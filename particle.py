@@ -1,34 +1,130 @@
 # -*- coding: utf-8 -*-
 
 import pygame
-import random
+from collections import OrderedDict
+import numpy as np
 from constants import PARTICLE_LIFE
 
-class Particle:
-    def __init__(self, x, y, color):
-        self.x = x
-        self.y = y
-        self.vx = random.uniform(-3, 3)
-        self.vy = random.uniform(-5, -1)
-        self.color = color
-        self.life = PARTICLE_LIFE
+class ParticleSystem:
+    """Fixed-capacity particle pool stored as NumPy structure-of-arrays.
+
+    Live particles occupy indices ``[0, count)``. ``update`` advances all of
+    them in one vectorized step and compacts dead ones away; spawns beyond
+    ``capacity`` are dropped.
+    """
+    def __init__(self, capacity=4096, seed=None):
+        self.capacity = capacity
+        self.count = 0
+        # Created on the first spawn: importing numpy.random slows startup
+        self.seed = seed
+        self.rng = None
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.int16)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
         self.max_life = PARTICLE_LIFE
-        self.size = random.randint(2, 4)
-    
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def spawn(self, x, y, color, count=1, jitter=0):
+        """Spawn ``count`` particles at each (x, y) in one bulk write.
+
+        ``x``, ``y`` and ``color`` may be scalars or per-origin sequences;
+        each origin is offset by a random 0..``jitter`` pixels.
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=np.float32))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float32))
+        color = np.asarray(color, dtype=np.uint8).reshape(-1, 3)
+        origins = max(len(x), len(y), len(color))
+        n = min(origins * count, self.capacity - self.count)
+        if n <= 0:
+            return
+        if self.rng is None:
+            self.rng = np.random.default_rng(self.seed)
+        start, end = self.count, self.count + n
+        self.x[start:end] = np.repeat(np.broadcast_to(x, origins), count)[:n]
+        self.y[start:end] = np.repeat(np.broadcast_to(y, origins), count)[:n]
+        self.color[start:end] = np.repeat(np.broadcast_to(color, (origins, 3)), count, axis=0)[:n]
+        if jitter:
+            self.x[start:end] += self.rng.integers(0, jitter + 1, n)
+            self.y[start:end] += self.rng.integers(0, jitter + 1, n)
+        self.vx[start:end] = self.rng.uniform(-3, 3, n)
+        self.vy[start:end] = self.rng.uniform(-5, -1, n)
+        self.life[start:end] = PARTICLE_LIFE
+        self.size[start:end] = self.rng.integers(2, 5, n)
+        self.count = end
+
     def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.vy += 0.2  # Gravity
-        self.life -= 1
-        self.size = max(0, self.size - 0.1)
-    
-    def draw(self, screen):
-        if self.life > 0:
-            alpha = int(255 * (self.life / self.max_life))
-            color = (*self.color, alpha)
-            surf = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-            pygame.draw.circle(surf, color, (self.size, self.size), self.size)
-            screen.blit(surf, (self.x - self.size, self.y - self.size))
-    
-    def is_alive(self):
-        return self.life > 0 
\ No newline at end of file
+        """Advance every live particle one frame and drop the dead ones"""
+        n = self.count
+        if not n:
+            return
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.vy[:n] += 0.2  # Gravity
+        self.life[:n] -= 1
+        np.maximum(self.size[:n] - 0.1, 0, out=self.size[:n])
+        alive = np.flatnonzero(self.life[:n] > 0)
+        if len(alive) < n:
+            for array in (self.x, self.y, self.vx, self.vy, self.life, self.size, self.color):
+                array[:len(alive)] = array[alive]
+            self.count = len(alive)
+
+class ParticleSpriteCache:
+    """Bounded LRU cache of pre-rendered particle circles.
+
+    Sprites are keyed by (color, size quantized to ``size_step`` px, alpha
+    quantized to ``alpha_levels`` steps) and built on first use, so a frame
+    of particles becomes one ``Surface.blits`` call with no allocations.
+    """
+    def __init__(self, max_size=1024, size_step=0.5, alpha_levels=16):
+        self.max_size = max_size
+        self.size_step = size_step
+        self.alpha_levels = alpha_levels
+        self.sprites = OrderedDict()
+        self.allocations = 0
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def get(self, key):
+        """Return the sprite for a packed key, rendering it on a miss"""
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+        rgb, size_q, alpha_q = key >> 16, key >> 8 & 0xFF, key & 0xFF
+        radius = size_q * self.size_step
+        alpha = min(255, alpha_q * 256 // self.alpha_levels)
+        color = (rgb >> 16, rgb >> 8 & 0xFF, rgb & 0xFF, alpha)
+        sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, color, (radius, radius), radius)
+        self.allocations += 1
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.max_size:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def blit_sequence(self, particles):
+        """Build the ``(sprite, (x, y))`` list for every visible particle"""
+        n = particles.count
+        if not n:
+            return []
+        size_q = np.rint(particles.size[:n] / self.size_step).astype(np.int64)
+        alpha_q = particles.life[:n].astype(np.int64) * self.alpha_levels // particles.max_life
+        color = particles.color[:n].astype(np.int64)
+        rgb = color[:, 0] << 16 | color[:, 1] << 8 | color[:, 2]
+        keys = (rgb << 16 | size_q << 8 | alpha_q).tolist()
+        radius = size_q * self.size_step
+        xs = (particles.x[:n] - radius).tolist()
+        ys = (particles.y[:n] - radius).tolist()
+        visible = (size_q > 0).tolist()
+        get = self.get
+        return [(get(key), (x, y)) for key, x, y, show in zip(keys, xs, ys, visible) if show]
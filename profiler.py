@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+"""Per-phase frame-time and startup profilers, and a latency histogram.
+
+Code marks the end of each phase with ``profiler.mark(name)``; the time
+since the previous mark is charged to that phase. Per-frame totals go into
+fixed-size NumPy ring buffers, from which rolling statistics and CSV exports
+are computed. While disabled ``mark`` is a no-op function, so instrumented
+code pays a single call per phase.
+"""
+
+import bisect
+import csv
+import time
+import numpy as np
+
+def _noop(name):
+    pass
+
+class Profiler:
+    def __init__(self, capacity=300, enabled=False):
+        self.capacity = capacity
+        self.samples = {}  # phase -> ring buffer of per-frame seconds
+        self.frame_times = np.zeros(capacity)
+        self.frames = 0  # frames recorded since the last reset
+        self.current = {}
+        self.frame_start = 0.0
+        self.last = 0.0
+        self.mark = _noop
+        self.enabled = False
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        self.enabled = True
+        self.mark = self._mark
+        self.frame_start = self.last = time.perf_counter()
+
+    def disable(self):
+        self.enabled = False
+        self.mark = _noop
+        self.current.clear()
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def reset(self):
+        self.samples.clear()
+        self.frame_times[:] = 0
+        self.frames = 0
+
+    def _mark(self, name):
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0.0) + now - self.last
+        self.last = now
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = self.last = time.perf_counter()
+
+    def end_frame(self):
+        """Store this frame's phase totals and total frame time"""
+        if not self.enabled:
+            return
+        index = self.frames % self.capacity
+        current = self.current
+        for name, buffer in self.samples.items():
+            buffer[index] = current.pop(name, 0.0)
+        for name, value in current.items():
+            buffer = self.samples[name] = np.zeros(self.capacity)
+            buffer[index] = value
+        current.clear()
+        self.frame_times[index] = time.perf_counter() - self.frame_start
+        self.frames += 1
+
+    def recent(self, buffer):
+        """Filled part of a ring buffer in recording order"""
+        if self.frames < self.capacity:
+            return buffer[:self.frames]
+        index = self.frames % self.capacity
+        return np.concatenate((buffer[index:], buffer[:index]))
+
+    def stats(self):
+        """Rolling mean, p95 and p99 in milliseconds per phase, plus 'frame'"""
+        result = {}
+        if not self.frames:
+            return result
+        for name, buffer in list(self.samples.items()) + [('frame', self.frame_times)]:
+            values = self.recent(buffer) * 1000
+            p95, p99 = np.percentile(values, (95, 99))
+            result[name] = {'mean': float(values.mean()), 'p95': float(p95), 'p99': float(p99)}
+        return result
+
+    def export_csv(self, path):
+        """Write one row per recorded frame: frame number, total and phase times in ms"""
+        names = list(self.samples)
+        columns = [self.recent(self.frame_times)] + [self.recent(self.samples[name]) for name in names]
+        first = max(0, self.frames - self.capacity)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'frame_ms'] + [name + '_ms' for name in names])
+            for offset, row in enumerate(zip(*columns)):
+                writer.writerow([first + offset] + [f"{value * 1000:.4f}" for value in row])
+        return path
+
+class StartupProfile:
+    """Wall-clock phases from launch to the first presented frame.
+
+    Each ``mark(name)`` charges the time since the previous mark (or since
+    ``start``) to ``name``; ``report`` formats the breakdown.
+    """
+    def __init__(self, start=None):
+        self.start = self.last = start if start is not None else time.perf_counter()
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = ["Startup profile (ms):"]
+        elapsed = 0.0
+        for name, seconds in self.phases:
+            elapsed += seconds
+            lines.append(f"  {name:<18}{seconds * 1000:8.1f}{elapsed * 1000:10.1f}")
+        return '\n'.join(lines)
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of millisecond latencies.
+
+    ``bounds`` are inclusive bucket upper edges; larger values land in an
+    overflow bucket. Recording is a bisect and an increment, so it can run
+    for every input.
+    """
+    def __init__(self, bounds=(1, 2, 4, 8, 12, 17, 25, 33, 50, 100, 250)):
+        self.bounds = bounds
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the ``p``-th percentile (0-100)"""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max,
+        }
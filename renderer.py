@@ -3,35 +3,274 @@
 import pygame
 from constants import *
 from enums import GameState, GameMode
+from collections import OrderedDict
+from particle import ParticleSpriteCache
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces.
+
+    Keyed by (font, text, color, antialias); ``hits`` and ``misses`` count
+    lookups so the cache's effectiveness can be checked at runtime.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = font.render(text, antialias, color)
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+class CellSprites:
+    """Shared cache of board cell sprites keyed by color, size and border.
+
+    Sprites are rounded cells on ``BOARD_COLORKEY``, ready to blit onto a
+    colorkeyed board surface. Any number of boards at any cell size can
+    draw from one instance.
+    """
+    def __init__(self):
+        self.sprites = {}
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def get(self, color, size, border=GRAY, border_width=1, keyed=False):
+        """Sprite of a ``size`` px cell in ``color`` (None for an empty cell).
+
+        ``keyed`` sprites have the colorkey set, for blitting straight onto
+        the screen rather than onto a colorkeyed board surface.
+        """
+        key = (color, size, border, border_width, keyed)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites[key] = pygame.Surface((size, size)).convert()
+            # Corners keep the colorkey so whatever is beneath shows through
+            sprite.fill(BOARD_COLORKEY)
+            if keyed:
+                sprite.set_colorkey(BOARD_COLORKEY)
+            rect = sprite.get_rect()
+            radius = max(1, size // 4) if size >= 4 else 0
+            pygame.draw.rect(sprite, color or EMPTY_CELL, rect, border_radius=radius)
+            if border_width and size >= 4:
+                pygame.draw.rect(sprite, border, rect, border_width, border_radius=radius)
+        return sprite
 
 class Renderer:
     def __init__(self, game):
         self.game = game
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        self.large_font = pygame.font.Font(None, 72)
+        self.fonts = {}  # size -> font, loaded on first use
+        self.particle_sprites = ParticleSpriteCache()
+        self.text_cache = TextCache()
+        self.panel_rect = pygame.Rect(60, 100, 320, 500)
+        # Static layers are drawn once and reused until invalidated
+        self.cache_static_layers = True
+        self.static_layer = None
+        # Dirty-rectangle presentation: name -> (signature, rect) of last frame
+        self.dirty_rect_updates = DIRTY_RECT_UPDATES
+        self.show_dirty_rects = False
+        self.dirty_rects = []
+        self.last_dirty_rects = []
+        self.tracked = {}
+        self.frame_count = 0
+        self.last_state = None
+        self.show_input_stats = False
+        # Profiler overlay; statistics are refreshed every few frames
+        self.profiler = game.profiler
+        self.show_profiler = False
+        self.profiler_stats = {}
+        self.overlay_rect = pygame.Rect(SCREEN_WIDTH - 410, 100, 390, 560)
+        self.overlay_background = None
+        # Locked cells live on an offscreen surface covering the visible part
+        # of the board (the viewport), updated on lock, clear and scroll
+        self.board_surface = None
+        self.board_version = None
+        self.layout_size = None  # board (width, height) the layout was made for
+        self.cell_size = CELL_SIZE
+        self.grid_rect = pygame.Rect(GRID_OFFSET_X, GRID_OFFSET_Y, GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE)
+        self.view_x = self.view_y = 0  # top-left visible cell
+        self.view_cols, self.view_rows = GRID_WIDTH, GRID_HEIGHT
+        self.cell_sprites = CellSprites()
+        self.empty_row = None
+        self.ghost_cell = None
+        # Versus play: player id -> (surface, board, version, cell size)
+        self.opponent_boards = {}
+        self.game.engine.add_listener(self.on_engine_event)
+    
+    def load_font(self, size):
+        """The default font at ``size``, starting the font module on first use"""
+        font = self.fonts.get(size)
+        if font is None:
+            pygame.font.init()
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    @property
+    def font(self):
+        return self.load_font(36)
+
+    @property
+    def small_font(self):
+        return self.load_font(24)
+
+    @property
+    def large_font(self):
+        return self.load_font(72)
+
+    def text(self, font, text, color, antialias=True):
+        """Render text through the LRU text cache"""
+        return self.text_cache.render(font, text, color, antialias)
     
     def render(self):
         """Main render method that calls appropriate render based on game state"""
+        mark = self.profiler.mark
         if self.game.state == GameState.MENU:
             self.render_menu()
+            mark('render_menu')
         elif self.game.state == GameState.PLAYING:
             self.render_game()
         elif self.game.state == GameState.PAUSED:
             self.render_pause_screen()
+            mark('render_pause_screen')
         elif self.game.state == GameState.GAME_OVER:
             self.render_game_over()
+            mark('render_game_over')
+        if self.show_profiler:
+            self.draw_profiler_overlay()
+            mark('profiler_overlay')
+    
+    def present(self):
+        """Show the rendered frame, updating only dirty regions when enabled"""
+        full = (not self.dirty_rect_updates or self.game.state != GameState.PLAYING
+                or self.last_state != self.game.state)
+        self.last_state = self.game.state
+        rects = self.dirty_rects
+        self.dirty_rects = []
+        if self.show_dirty_rects and not full:
+            for rect in rects:
+                pygame.draw.rect(self.game.screen, RED, rect, 1)
+            # Repaint last frame's outlines so they don't linger on screen
+            rects, self.last_dirty_rects = rects + self.last_dirty_rects, rects
+        if full:
+            self.tracked.clear()
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+    
+    def track(self, name, signature, rect):
+        """Mark a region dirty if what is drawn there changed since last frame"""
+        previous = self.tracked.get(name)
+        if previous is None or previous[0] != signature:
+            if rect is not None:
+                self.dirty_rects.append(rect)
+            if previous is not None and previous[1] is not None:
+                self.dirty_rects.append(previous[1])
+        self.tracked[name] = (signature, rect)
+    
+    def cells_rect(self, positions):
+        """Screen rectangle covering the visible part of the given grid cells, or None"""
+        if not positions:
+            return None
+        xs = [x for x, _ in positions]
+        ys = [y for _, y in positions]
+        cell = self.cell_size
+        left, top = self.cell_origin(min(xs), min(ys))
+        rect = pygame.Rect(left, top, (max(xs) - min(xs) + 1) * cell,
+                           (max(ys) - min(ys) + 1) * cell).clip(self.grid_rect)
+        return rect if rect.width and rect.height else None
+    
+    def in_view(self, x, y):
+        return (self.view_x <= x < self.view_x + self.view_cols
+                and self.view_y <= y < self.view_y + self.view_rows)
+    
+    def cell_origin(self, x, y):
+        """Screen position of the top-left corner of board cell (x, y)"""
+        cell = self.cell_size
+        return (self.grid_rect.x + (x - self.view_x) * cell, self.grid_rect.y + (y - self.view_y) * cell)
+    
+    def layout_board(self):
+        """Fit the board to the grid area: cell size, viewport and cell sprites.
+
+        A board that fits at ``MIN_CELL_SIZE`` or more is scaled to show
+        whole. Larger ones are drawn at the size that fits their width (at
+        least ``MIN_CELL_SIZE``) through a viewport that follows the piece.
+        """
+        board = self.game.engine.board
+        self.layout_size = (board.width, board.height)
+        cell = min(CELL_SIZE, BOARD_AREA_WIDTH // board.width, BOARD_AREA_HEIGHT // board.height)
+        if cell < MIN_CELL_SIZE:
+            cell = max(MIN_CELL_SIZE, min(CELL_SIZE, BOARD_AREA_WIDTH // board.width))
+        self.cell_size = cell
+        self.view_cols = min(board.width, BOARD_AREA_WIDTH // cell)
+        self.view_rows = min(board.height, BOARD_AREA_HEIGHT // cell)
+        self.view_x = self.view_y = 0
+        self.grid_rect = pygame.Rect(GRID_OFFSET_X, GRID_OFFSET_Y, self.view_cols * cell, self.view_rows * cell)
+        self.empty_row = None
+        self.ghost_cell = pygame.Surface((cell, cell), pygame.SRCALPHA)
+        pygame.draw.rect(self.ghost_cell, GLOW, self.ghost_cell.get_rect(), border_radius=max(1, cell // 4))
+        self.board_surface = None
+        # The grid frame in the static layer matches the viewport
+        self.static_layer = None
     
     def render_game(self):
         """Render the main game screen"""
-        # Draw a subtle vertical gradient background
-        self.draw_background_gradient()
+        self.frame_count += 1
+        mark = self.profiler.mark
+        board = self.game.engine.board
+        if self.layout_size != (board.width, board.height):
+            self.layout_board()
+        # Background gradient, grid frame and panel chrome never change
+        if self.cache_static_layers:
+            self.game.screen.blit(self.get_static_layer(), (0, 0))
+        else:
+            self.draw_static_layer(self.game.screen)
+        mark('static_layer')
         self.draw_grid()
+        mark('draw_grid')
         self.draw_ui()
+        mark('draw_ui')
         self.draw_particles()
+        mark('draw_particles')
         self.draw_mode_info()
+        mark('draw_mode_info')
+        if self.show_input_stats:
+            self.draw_input_stats()
+            mark('draw_input_stats')
+    
+    def get_static_layer(self):
+        """Return the cached static layer, rebuilding it after a resize"""
+        size = self.game.screen.get_size()
+        if self.static_layer is None or self.static_layer.get_size() != size:
+            self.static_layer = pygame.Surface(size).convert()
+            self.draw_static_layer(self.static_layer)
+        return self.static_layer
+    
+    def invalidate_layers(self):
+        """Drop cached layers so they are redrawn (e.g. after a theme change)"""
+        self.static_layer = None
+    
+    def draw_static_layer(self, surface):
+        """Draw every static element of the game screen onto a surface"""
+        self.draw_background_gradient(surface)
+        self.draw_grid_frame(surface)
+        self.draw_panel_chrome(surface)
     
-    def draw_background_gradient(self):
+    def draw_background_gradient(self, surface):
         """Draw a vertical gradient background for a modern look."""
         for y in range(SCREEN_HEIGHT):
             color = (
@@ -39,133 +278,294 @@ class Renderer:
                 int(30 + (y / SCREEN_HEIGHT) * 60),
                 int(50 + (y / SCREEN_HEIGHT) * 80)
             )
-            pygame.draw.line(self.game.screen, color, (0, y), (SCREEN_WIDTH, y))
+            pygame.draw.line(surface, color, (0, y), (SCREEN_WIDTH, y))
     
-    def draw_grid(self):
-        """Draw the game grid with pieces, rounded corners, and drop shadow."""
+    def draw_grid_frame(self, surface):
+        """Draw the grid's drop shadow, rounded background and border."""
         # Drop shadow
-        shadow_rect = pygame.Rect(GRID_OFFSET_X + 8, GRID_OFFSET_Y + 8, GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE)
-        shadow_surf = pygame.Surface((GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE), pygame.SRCALPHA)
+        grid_rect = self.grid_rect
+        shadow_surf = pygame.Surface(grid_rect.size, pygame.SRCALPHA)
         pygame.draw.rect(shadow_surf, SHADOW, shadow_surf.get_rect(), border_radius=18)
-        self.game.screen.blit(shadow_surf, (GRID_OFFSET_X + 8, GRID_OFFSET_Y + 8))
+        surface.blit(shadow_surf, (grid_rect.x + 8, grid_rect.y + 8))
         # Main grid background
-        grid_rect = pygame.Rect(GRID_OFFSET_X, GRID_OFFSET_Y, GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE)
-        pygame.draw.rect(self.game.screen, DARK_GRAY, grid_rect, border_radius=18)
-        pygame.draw.rect(self.game.screen, PANEL_BORDER, grid_rect, 3, border_radius=18)
-        # Draw grid cells
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                color = self.game.grid[y][x] if self.game.grid[y][x] else (30, 30, 50)
-                cell_rect = pygame.Rect(GRID_OFFSET_X + x * CELL_SIZE, GRID_OFFSET_Y + y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(self.game.screen, color, cell_rect, border_radius=8)
-                pygame.draw.rect(self.game.screen, GRAY, cell_rect, 1, border_radius=8)
-        # Draw ghost piece (glow effect)
-        ghost = self.game.logic.get_ghost_position()
-        if ghost:
-            for x, y in ghost.get_positions():
-                if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                    ghost_rect = pygame.Rect(GRID_OFFSET_X + x * CELL_SIZE, GRID_OFFSET_Y + y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                    glow_surf = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-                    pygame.draw.rect(glow_surf, GLOW, glow_surf.get_rect(), border_radius=8)
-                    self.game.screen.blit(glow_surf, ghost_rect.topleft)
-        # Draw current piece (with white border)
-        if self.game.current_piece:
-            for x, y in self.game.current_piece.get_positions():
-                if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                    cell_rect = pygame.Rect(GRID_OFFSET_X + x * CELL_SIZE, GRID_OFFSET_Y + y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                    pygame.draw.rect(self.game.screen, self.game.current_piece.color, cell_rect, border_radius=8)
-                    pygame.draw.rect(self.game.screen, WHITE, cell_rect, 2, border_radius=8)
+        pygame.draw.rect(surface, DARK_GRAY, grid_rect, border_radius=18)
+        pygame.draw.rect(surface, PANEL_BORDER, grid_rect, 3, border_radius=18)
     
-    def draw_ui(self):
-        """Draw the UI elements (score, next piece, held piece) with modern panels."""
-        # Draw side panel with rounded corners and drop shadow
-        panel_rect = pygame.Rect(60, 100, 320, 500)
-        shadow_surf = pygame.Surface((320, 500), pygame.SRCALPHA)
+    def draw_panel_chrome(self, surface):
+        """Draw the side panel's drop shadow, rounded body and border."""
+        panel_rect = self.panel_rect
+        shadow_surf = pygame.Surface(panel_rect.size, pygame.SRCALPHA)
         pygame.draw.rect(shadow_surf, SHADOW, shadow_surf.get_rect(), border_radius=24)
-        self.game.screen.blit(shadow_surf, (panel_rect.x + 8, panel_rect.y + 8))
-        panel_surf = pygame.Surface((320, 500), pygame.SRCALPHA)
+        surface.blit(shadow_surf, (panel_rect.x + 8, panel_rect.y + 8))
+        panel_surf = pygame.Surface(panel_rect.size, pygame.SRCALPHA)
         pygame.draw.rect(panel_surf, PANEL_BG, panel_surf.get_rect(), border_radius=24)
         pygame.draw.rect(panel_surf, PANEL_BORDER, panel_surf.get_rect(), 3, border_radius=24)
+        surface.blit(panel_surf, panel_rect.topleft)
+    
+    def on_engine_event(self, event, **data):
+        """Keep the board surface in sync with locks and line clears"""
+        board = self.game.engine.board
+        if self.board_surface is None or self.layout_size != (board.width, board.height):
+            return
+        # Only patch a surface that matched the board right before this change
+        if event == 'piece_locked' and self.board_version == board.version - len(data['positions']):
+            for x, y in data['positions']:
+                self.paint_rows(y, y + 1, x, x + 1)
+        elif event == 'lines_cleared' and self.board_version == board.version - 1:
+            self.scroll_cleared_rows(data['rows'], data['top'])
+        else:
+            return
+        self.board_version = board.version
+    
+    def tile(self, color):
+        """Sprite of a cell in ``color`` (None for empty) at the current cell size"""
+        return self.cell_sprites.get(color, self.cell_size)
+    
+    def get_empty_row(self):
+        """A viewport-wide strip of empty cells, blitted for empty rows"""
+        if self.empty_row is None:
+            cell = self.cell_size
+            self.empty_row = pygame.Surface((self.view_cols * cell, cell)).convert()
+            self.empty_row.blits([(self.tile(None), (x * cell, 0)) for x in range(self.view_cols)], False)
+        return self.empty_row
+    
+    def paint_board(self):
+        """Repaint every visible cell of the board surface from scratch"""
+        board = self.game.engine.board
+        size = (self.view_cols * self.cell_size, self.view_rows * self.cell_size)
+        if self.board_surface is None or self.board_surface.get_size() != size:
+            self.board_surface = pygame.Surface(size).convert()
+            # Pixels outside the rounded cells show the grid frame beneath
+            self.board_surface.set_colorkey(BOARD_COLORKEY)
+        self.paint_rows(self.view_y, self.view_y + self.view_rows)
+        self.board_version = board.version
+    
+    def paint_rows(self, y0, y1, x0=None, x1=None):
+        """Repaint the visible cells of rows ``y0..y1-1``, columns ``x0..x1-1`` (default all)"""
+        board = self.game.engine.board
+        vx, vy, cell = self.view_x, self.view_y, self.cell_size
+        full_width = x0 is None
+        x0 = vx if x0 is None else max(x0, vx)
+        x1 = vx + self.view_cols if x1 is None else min(x1, vx + self.view_cols)
+        tile = self.tile
+        sequence = []
+        for y in range(max(y0, vy), min(y1, vy + self.view_rows)):
+            top = (y - vy) * cell
+            if full_width and not board.rows[y]:
+                sequence.append((self.get_empty_row(), (0, top)))
+                continue
+            row = board.cells[y]
+            for x in range(x0, x1):
+                sequence.append((tile(row[x]), ((x - vx) * cell, top)))
+        self.board_surface.blits(sequence, False)
+    
+    def scroll_cleared_rows(self, rows, top=0):
+        """Shift the visible rows above each cleared run down and paint the rows moved into view.
+
+        Rows above ``top``, the highest row the clear changed, are left alone.
+        """
+        cell = self.cell_size
+        width = self.view_cols * cell
+        first = max(top, self.view_y) - self.view_y  # first affected view row
+        rows = sorted(rows)
+        runs = []
+        for y in rows:
+            if runs and runs[-1][0] + runs[-1][1] == y:
+                runs[-1][1] += 1
+            else:
+                runs.append([y, 1])
+        # Top-down, each run scrolls the changed rows above it in one
+        # operation. Runs above the viewport leave it unchanged
+        exposed = 0
+        for start, length in runs:
+            end = min(start + length - self.view_y, self.view_rows)
+            if end <= first:
+                continue
+            area = self.board_surface.subsurface((0, first * cell, width, (end - first) * cell))
+            area.scroll(0, length * cell)
+            exposed += min(length, end - first)
+        first += self.view_y
+        self.paint_rows(first, first + exposed)
+    
+    def follow_piece(self):
+        """Scroll the viewport to keep the piece, and its landing spot if possible, in view"""
+        board = self.game.engine.board
+        piece = self.game.engine.current_piece
+        if piece is None or (self.view_cols, self.view_rows) == (board.width, board.height):
+            return
+        data = piece.data
+        ghost = self.game.logic.get_ghost_position()
+        top = piece.y + data.top - VIEW_MARGIN
+        bottom = (ghost.y if ghost else piece.y) + data.bottom + 1 + VIEW_MARGIN
+        view_y = self.view_y
+        if bottom - top > self.view_rows or top < view_y:
+            view_y = top
+        elif bottom > view_y + self.view_rows:
+            view_y = bottom - self.view_rows
+        left = piece.x + data.left - VIEW_MARGIN
+        right = piece.x + data.right + 1 + VIEW_MARGIN
+        view_x = self.view_x
+        if left < view_x:
+            view_x = left
+        elif right > view_x + self.view_cols:
+            view_x = right - self.view_cols
+        self.scroll_view(min(max(view_x, 0), board.width - self.view_cols),
+                         min(max(view_y, 0), board.height - self.view_rows))
+    
+    def scroll_view(self, view_x, view_y):
+        """Move the viewport, reusing the pixels still in view"""
+        dx, dy = view_x - self.view_x, view_y - self.view_y
+        if not dx and not dy:
+            return
+        self.view_x, self.view_y = view_x, view_y
+        cols, rows = self.view_cols, self.view_rows
+        if abs(dx) >= cols or abs(dy) >= rows:
+            self.paint_board()
+            return
+        self.board_surface.scroll(-dx * self.cell_size, -dy * self.cell_size)
+        if dy > 0:
+            self.paint_rows(view_y + rows - dy, view_y + rows)
+        elif dy < 0:
+            self.paint_rows(view_y, view_y - dy)
+        if dx > 0:
+            self.paint_rows(view_y, view_y + rows, view_x + cols - dx, view_x + cols)
+        elif dx < 0:
+            self.paint_rows(view_y, view_y + rows, view_x, view_x - dx)
+    
+    def draw_grid(self):
+        """Draw the grid cells, ghost piece and current piece."""
+        # Locked cells come from the incrementally updated board surface
+        board = self.game.engine.board
+        if self.layout_size != (board.width, board.height):
+            self.layout_board()
+        if self.board_surface is None or self.board_version != board.version:
+            self.paint_board()
+        self.follow_piece()
+        screen = self.game.screen
+        screen.blit(self.board_surface, self.grid_rect)
+        self.track('board', (board.version, self.view_x, self.view_y), self.grid_rect)
+        cell = self.cell_size
+        # Draw ghost piece (glow effect)
+        ghost = self.game.logic.get_ghost_position()
+        ghost_positions = ghost.get_positions() if ghost else []
+        self.track('ghost', tuple(ghost_positions), self.cells_rect(ghost_positions))
+        for x, y in ghost_positions:
+            if self.in_view(x, y):
+                screen.blit(self.ghost_cell, self.cell_origin(x, y))
+        # Draw current piece (with white border), eased down between gravity
+        # drops by the interpolated render time
+        piece = self.game.engine.current_piece
+        piece_positions = piece.get_positions() if piece else []
+        fall = int(self.game.logic.fall_progress(self.game.render_time()) * cell)
+        piece_rect = self.cells_rect(piece_positions)
+        if piece_rect and fall:
+            piece_rect.height += fall
+        self.track('piece', (tuple(piece_positions), piece and piece.color, fall), piece_rect)
+        if piece:
+            radius = max(1, cell // 4)
+            border = max(1, cell // 16)
+            for x, y in piece_positions:
+                if self.in_view(x, y):
+                    left, top = self.cell_origin(x, y)
+                    cell_rect = pygame.Rect(left, top + fall, cell, cell)
+                    pygame.draw.rect(screen, piece.color, cell_rect, border_radius=radius)
+                    pygame.draw.rect(screen, WHITE, cell_rect, border, border_radius=radius)
+    
+    def draw_ui(self):
+        """Draw the panel contents (score, next piece, held piece) over the cached chrome."""
+        screen = self.game.screen
+        px, py = self.panel_rect.topleft
         # Score
-        score_text = self.large_font.render(f"{self.game.score:,}", True, YELLOW)
-        score_label = self.font.render("SCORE", True, LIGHT_GRAY)
-        panel_surf.blit(score_label, (30, 30))
-        panel_surf.blit(score_text, (30, 65))
+        score_text = self.text(self.large_font, f"{self.game.engine.score:,}", YELLOW)
+        score_label = self.text(self.font, "SCORE", LIGHT_GRAY)
+        screen.blit(score_label, (px + 30, py + 30))
+        self.track('score', self.game.engine.score, screen.blit(score_text, (px + 30, py + 65)))
         # Level
-        level_label = self.font.render("LEVEL", True, LIGHT_GRAY)
-        level_text = self.font.render(f"{self.game.level}", True, GREEN)
-        panel_surf.blit(level_label, (30, 130))
-        panel_surf.blit(level_text, (30, 165))
+        level_label = self.text(self.font, "LEVEL", LIGHT_GRAY)
+        level_text = self.text(self.font, f"{self.game.engine.level}", GREEN)
+        screen.blit(level_label, (px + 30, py + 130))
+        self.track('level', self.game.engine.level, screen.blit(level_text, (px + 30, py + 165)))
         # Lines
-        lines_label = self.font.render("LINES", True, LIGHT_GRAY)
-        lines_text = self.font.render(f"{self.game.lines_cleared}", True, CYAN)
-        panel_surf.blit(lines_label, (30, 210))
-        panel_surf.blit(lines_text, (30, 245))
+        lines_label = self.text(self.font, "LINES", LIGHT_GRAY)
+        lines_text = self.text(self.font, f"{self.game.engine.lines_cleared}", CYAN)
+        screen.blit(lines_label, (px + 30, py + 210))
+        self.track('lines', self.game.engine.lines_cleared, screen.blit(lines_text, (px + 30, py + 245)))
         # Time Attack Timer
-        if self.game.game_mode.name == 'TIME_ATTACK' and self.game.time_attack_start is not None:
-            current_time = pygame.time.get_ticks()
-            elapsed = current_time - self.game.time_attack_start
-            remaining = max(0, (120000 - elapsed) // 1000)
-            timer_label = self.font.render("TIME LEFT", True, LIGHT_GRAY)
-            timer_text = self.font.render(f"{remaining:02d}s", True, RED if remaining <= 10 else YELLOW)
-            panel_surf.blit(timer_label, (30, 290))
-            panel_surf.blit(timer_text, (30, 325))
+        remaining = self.game.engine.time_attack_remaining()
+        if remaining is not None:
+            remaining //= 1000
+            timer_label = self.text(self.font, "TIME LEFT", LIGHT_GRAY)
+            timer_text = self.text(self.font, f"{remaining:02d}s", RED if remaining <= 10 else YELLOW)
+            self.track('timer', remaining, screen.blit(timer_label, (px + 30, py + 290))
+                       .union(screen.blit(timer_text, (px + 30, py + 325))))
         # Next piece (with icon)
-        next_label = self.font.render("NEXT", True, LIGHT_GRAY)
-        panel_surf.blit(next_label, (200, 30))
-        if self.game.next_piece:
-            for i, row in enumerate(self.game.next_piece.shape):
-                for j, cell in enumerate(row):
-                    if cell == '#':
-                        rect = pygame.Rect(220 + j * 20, 70 + i * 20, 18, 18)
-                        pygame.draw.rect(panel_surf, self.game.next_piece.color, rect, border_radius=6)
-                        pygame.draw.rect(panel_surf, WHITE, rect, 1, border_radius=6)
+        next_label = self.text(self.font, "NEXT", LIGHT_GRAY)
+        screen.blit(next_label, (px + 200, py + 30))
+        next_piece = self.game.engine.next_piece
+        self.track('next', next_piece and next_piece.shape_type, pygame.Rect(px + 220, py + 70, 100, 100))
+        if self.game.engine.next_piece:
+            for j, i in self.game.engine.next_piece.data.cells:
+                rect = pygame.Rect(px + 220 + j * 20, py + 70 + i * 20, 18, 18)
+                pygame.draw.rect(screen, self.game.engine.next_piece.color, rect, border_radius=6)
+                pygame.draw.rect(screen, WHITE, rect, 1, border_radius=6)
         # Held piece (with icon)
-        hold_label = self.font.render("HOLD", True, LIGHT_GRAY)
-        panel_surf.blit(hold_label, (200, 180))
-        if self.game.held_piece:
-            for i, row in enumerate(self.game.held_piece.shape):
-                for j, cell in enumerate(row):
-                    if cell == '#':
-                        color = self.game.held_piece.color if self.game.can_hold else GRAY
-                        rect = pygame.Rect(220 + j * 20, 220 + i * 20, 18, 18)
-                        pygame.draw.rect(panel_surf, color, rect, border_radius=6)
-                        pygame.draw.rect(panel_surf, WHITE, rect, 1, border_radius=6)
-        self.game.screen.blit(panel_surf, (panel_rect.x, panel_rect.y))
+        hold_label = self.text(self.font, "HOLD", LIGHT_GRAY)
+        screen.blit(hold_label, (px + 200, py + 180))
+        held_piece = self.game.engine.held_piece
+        self.track('hold', (held_piece and held_piece.shape_type, self.game.engine.can_hold),
+                   pygame.Rect(px + 220, py + 220, 100, 100))
+        if self.game.engine.held_piece:
+            color = self.game.engine.held_piece.color if self.game.engine.can_hold else GRAY
+            for j, i in self.game.engine.held_piece.data.cells:
+                rect = pygame.Rect(px + 220 + j * 20, py + 220 + i * 20, 18, 18)
+                pygame.draw.rect(screen, color, rect, border_radius=6)
+                pygame.draw.rect(screen, WHITE, rect, 1, border_radius=6)
     
     def draw_particles(self):
-        """Draw all particles"""
-        for particle in self.game.particles:
-            particle.draw(self.game.screen)
+        """Draw all particles with one batched blit from the sprite cache"""
+        sequence = self.particle_sprites.blit_sequence(self.game.particles)
+        if sequence:
+            rects = self.game.screen.blits(sequence)
+            bounds = rects[0].unionall(rects)
+        else:
+            bounds = None
+        # Particles move every frame, so their area is dirty while any are alive
+        self.track('particles', bounds and self.frame_count, bounds)
     
     def render_menu(self):
         """Render the main menu"""
         self.game.screen.fill(BLACK)
         
-        title = self.large_font.render("TETRIS", True, CYAN)
+        title = self.text(self.large_font, "TETRIS", CYAN)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 150))
         self.game.screen.blit(title, title_rect)
         
-        subtitle = self.font.render("Feature Rich Edition", True, WHITE)
+        subtitle = self.text(self.font, "Feature Rich Edition", WHITE)
         subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 220))
         self.game.screen.blit(subtitle, subtitle_rect)
         
+        width, height = self.game.board_size
+        board_text = self.text(self.font, f"<  Board {width} x {height}  >", YELLOW)
+        board_rect = board_text.get_rect(center=(SCREEN_WIDTH // 2, 290))
+        self.game.screen.blit(board_text, board_rect)
+        
         # Game mode selection
         modes = [
             ("Classic Mode", GameMode.CLASSIC),
             ("Time Attack (2 min)", GameMode.TIME_ATTACK),
-            ("Marathon (150 lines)", GameMode.MARATHON)
+            ("Marathon (150 lines)", GameMode.MARATHON),
+            ("Autoplay Demo", GameMode.AUTOPLAY)
         ]
         
         for i, (mode_name, mode) in enumerate(modes):
             color = CYAN if self.game.game_mode == mode else WHITE
-            text = self.font.render(mode_name, True, color)
+            text = self.text(self.font, mode_name, color)
             text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, 350 + i * 50))
             self.game.screen.blit(text, text_rect)
         
         # Instructions
         instructions = [
-            "Use ARROW KEYS to move and rotate",
+            "Use ARROW KEYS to move and rotate (LEFT/RIGHT here: board size)",
             "SPACE to hard drop",
             "C to hold piece",
             "P to pause",
@@ -173,7 +573,7 @@ class Renderer:
         ]
         
         for i, instruction in enumerate(instructions):
-            text = self.small_font.render(instruction, True, LIGHT_GRAY)
+            text = self.text(self.small_font, instruction, LIGHT_GRAY)
             text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, 550 + i * 30))
             self.game.screen.blit(text, text_rect)
     
@@ -184,11 +584,11 @@ class Renderer:
         overlay.fill(BLACK)
         self.game.screen.blit(overlay, (0, 0))
         
-        pause_text = self.large_font.render("PAUSED", True, WHITE)
+        pause_text = self.text(self.large_font, "PAUSED", WHITE)
         pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
         self.game.screen.blit(pause_text, pause_rect)
         
-        resume_text = self.font.render("Press P to resume", True, WHITE)
+        resume_text = self.text(self.font, "Press P to resume", WHITE)
         resume_rect = resume_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 80))
         self.game.screen.blit(resume_text, resume_rect)
     
@@ -200,27 +600,37 @@ class Renderer:
         self.game.screen.blit(overlay, (0, 0))
         
         # Show 'You Win!' if Marathon completed, else 'Game Over'
-        if self.game.game_mode.name == 'MARATHON' and self.game.lines_cleared >= 150:
-            game_over_text = self.large_font.render("YOU WIN!", True, GREEN)
+        if self.game.game_mode.name == 'MARATHON' and self.game.engine.lines_cleared >= 150:
+            game_over_text = self.text(self.large_font, "YOU WIN!", GREEN)
         else:
-            game_over_text = self.large_font.render("GAME OVER", True, RED)
+            game_over_text = self.text(self.large_font, "GAME OVER", RED)
         game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, 200))
         self.game.screen.blit(game_over_text, game_over_rect)
         
-        final_score = self.font.render(f"Final Score: {self.game.score:,}", True, WHITE)
+        final_score = self.text(self.font, f"Final Score: {self.game.engine.score:,}", WHITE)
         final_score_rect = final_score.get_rect(center=(SCREEN_WIDTH // 2, 300))
         self.game.screen.blit(final_score, final_score_rect)
         
-        restart_text = self.font.render("Press ENTER to restart", True, WHITE)
+        # Leaderboards load after the first frame (see finish_startup) and
+        # only rank standard games
+        if self.game.scores is not None and self.game.on_leaderboard():
+            best = self.game.scores.best(self.game.engine_mode.name.lower())
+            best_text = self.text(self.font, f"Best: {best:,}", YELLOW)
+            best_rect = best_text.get_rect(center=(SCREEN_WIDTH // 2, 345))
+            self.game.screen.blit(best_text, best_rect)
+        
+        restart_text = self.text(self.font, "Press ENTER to restart", WHITE)
         restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, 400))
         self.game.screen.blit(restart_text, restart_rect)
         
-        menu_text = self.font.render("Press ESC for menu", True, WHITE)
+        menu_text = self.text(self.font, "Press ESC for menu", WHITE)
         menu_rect = menu_text.get_rect(center=(SCREEN_WIDTH // 2, 450))
         self.game.screen.blit(menu_text, menu_rect)
 
     def draw_mode_info(self):
         """Draw information about the current game mode at the top of the screen."""
+        self.track('mode_info', (self.game.game_mode, self.game.engine.lines_cleared),
+                   pygame.Rect(0, 0, SCREEN_WIDTH, GRID_OFFSET_Y))
         info = ""
         if self.game.game_mode.name == 'CLASSIC':
             info = "Classic: Play endlessly, speed increases every 10 lines."
@@ -228,19 +638,165 @@ class Renderer:
             info = "Time Attack: Score as high as possible in 2 minutes."
         elif self.game.game_mode.name == 'MARATHON':
             info = "Marathon: Clear 150 lines to win."
+        elif self.game.game_mode.name == 'AUTOPLAY':
+            info = "Autoplay: The beam-search bot plays Classic rules."
+        if self.game.net is not None:
+            info = "Versus: Clear 2+ lines at once to send garbage."
         if info:
-            info_text = self.font.render(info, True, YELLOW)
+            info_text = self.text(self.font, info, YELLOW)
             info_rect = info_text.get_rect(center=(SCREEN_WIDTH // 2, 40))
             self.game.screen.blit(info_text, info_rect)
         # Marathon progress bar
         if self.game.game_mode.name == 'MARATHON':
-            progress = min(1.0, self.game.lines_cleared / 150)
+            progress = min(1.0, self.game.engine.lines_cleared / 150)
             bar_x = SCREEN_WIDTH // 2 - 150
             bar_y = 70
             bar_width = 300
             bar_height = 20
             pygame.draw.rect(self.game.screen, GRAY, (bar_x, bar_y, bar_width, bar_height), 2)
             pygame.draw.rect(self.game.screen, GREEN, (bar_x, bar_y, int(bar_width * progress), bar_height))
-            progress_text = self.small_font.render(f"{self.game.lines_cleared}/150 lines", True, WHITE)
+            progress_text = self.text(self.small_font, f"{self.game.engine.lines_cleared}/150 lines", WHITE)
             progress_rect = progress_text.get_rect(center=(SCREEN_WIDTH // 2, bar_y + bar_height // 2))
-            self.game.screen.blit(progress_text, progress_rect) 
\ No newline at end of file
+            self.game.screen.blit(progress_text, progress_rect)
+    
+    def draw_versus(self, client):
+        """Draw the opponents' boards right of the grid, the match status and network stats."""
+        screen = self.game.screen
+        area = pygame.Rect(self.grid_rect.right + 40, GRID_OFFSET_Y,
+                           SCREEN_WIDTH - self.grid_rect.right - 60, self.grid_rect.height)
+        opponents = sorted(client.opponents.items())
+        if opponents and area.width > 0:
+            columns = min(len(opponents), 3)
+            rows = -(-len(opponents) // columns)
+            tile_w, tile_h = area.width // columns, area.height // rows
+            for i, (player_id, engine) in enumerate(opponents):
+                tile = pygame.Rect(area.x + i % columns * tile_w, area.y + i // columns * tile_h, tile_w, tile_h)
+                self.draw_opponent(client, player_id, engine, tile)
+        # Match status under the mode line
+        place = client.place()
+        incoming = client.garbage.get(client.player_id, 0)
+        if place is not None:
+            status, color = f"Match over: you placed {place} of {len(client.results)}", YELLOW
+        elif self.game.engine.is_over:
+            status, color = "You are out. Waiting for the match to end...", RED
+        else:
+            status, color = f"Incoming garbage: {incoming}" if incoming else "", RED
+        if status:
+            status_text = self.text(self.font, status, color)
+            rect = screen.blit(status_text, status_text.get_rect(center=(SCREEN_WIDTH // 2, 70)))
+            self.track('versus_status', status, rect)
+        else:
+            self.track('versus_status', status, None)
+        # Network metrics
+        stats = client.stats()
+        latency = stats['latency']
+        text = (f"Net: down {stats['received_rate'] / 1024:.1f} KB/s, up {stats['sent_rate'] / 1024:.1f} KB/s, "
+                f"input to screen {latency['mean_ms']:.0f} ms mean / {latency['p95_ms']:.0f} ms p95")
+        stats_text = self.text(self.small_font, text, LIGHT_GRAY)
+        self.track('versus_net', text, screen.blit(stats_text, (20, SCREEN_HEIGHT - 55)))
+    
+    def draw_opponent(self, client, player_id, engine, rect):
+        """Draw one opponent's board scaled into ``rect``, under its name and score."""
+        screen = self.game.screen
+        board = engine.board
+        cell = max(1, min((rect.width - 10) // board.width, (rect.height - 28) // board.height))
+        cached = self.opponent_boards.get(player_id)
+        if cached is None or cached[1:] != (board, board.version, cell):
+            size = (board.width * cell, board.height * cell)
+            surface = cached[0] if cached and cached[0].get_size() == size else None
+            if surface is None:
+                surface = pygame.Surface(size).convert()
+                surface.set_colorkey(BOARD_COLORKEY)
+            surface.blits([(self.cell_sprites.get(color, cell), (x * cell, y * cell))
+                           for y, row in enumerate(board.cells) for x, color in enumerate(row)], False)
+            cached = self.opponent_boards[player_id] = (surface, board, board.version, cell)
+        origin = (rect.x, rect.y + 24)
+        board_rect = screen.blit(cached[0], origin)
+        piece = engine.current_piece
+        positions = piece.get_positions() if piece and not engine.is_over else []
+        if positions:
+            sprite = self.cell_sprites.get(piece.color, cell, WHITE, max(1, cell // 16), keyed=True)
+            screen.blits([(sprite, (origin[0] + x * cell, origin[1] + y * cell))
+                          for x, y in positions if 0 <= y < board.height], False)
+        label = f"{client.players.get(player_id, '?')}  {engine.score:,}"
+        garbage = client.garbage.get(player_id, 0)
+        if garbage:
+            label += f"  +{garbage}"
+        label_text = self.text(self.small_font, label, GRAY if engine.is_over else LIGHT_GRAY)
+        label_rect = screen.blit(label_text, rect.topleft)
+        self.track(f'opponent_{player_id}', (board.version, tuple(positions), label, engine.is_over),
+                   board_rect.union(label_rect))
+    
+    def render_versus_lobby(self, client):
+        """Render the versus waiting screen: connection state and joined players"""
+        screen = self.game.screen
+        screen.fill(BLACK)
+        title = self.text(self.large_font, "VERSUS", CYAN)
+        screen.blit(title, title.get_rect(center=(SCREEN_WIDTH // 2, 150)))
+        if client.error:
+            message, color = f"Server: {client.error}", RED
+        elif client.status == 'closed':
+            message, color = "Disconnected from the server", RED
+        elif client.status == 'connecting':
+            message, color = f"Connecting to {client.host}:{client.port}...", WHITE
+        else:
+            message, color = f"Waiting for players ({len(client.players)}/{client.needed})", WHITE
+        message_text = self.text(self.font, message, color)
+        screen.blit(message_text, message_text.get_rect(center=(SCREEN_WIDTH // 2, 250)))
+        for i, (player_id, name) in enumerate(sorted(client.players.items())):
+            you = " (you)" if player_id == client.player_id else ""
+            name_text = self.text(self.font, name + you, YELLOW if you else LIGHT_GRAY)
+            screen.blit(name_text, name_text.get_rect(center=(SCREEN_WIDTH // 2, 320 + i * 45)))
+        quit_text = self.text(self.small_font, "Press ESC to quit", GRAY)
+        screen.blit(quit_text, quit_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60)))
+    
+    def draw_input_stats(self):
+        """Draw the input-to-state latency summary in the bottom-left corner."""
+        stats = self.game.input_handler.latency.summary()
+        text = (f"Input latency: {stats['count']} inputs, mean {stats['mean_ms']:.1f} ms, "
+                f"p50 {stats['p50_ms']:.0f} / p95 {stats['p95_ms']:.0f} / max {stats['max_ms']:.0f} ms")
+        stats_text = self.text(self.small_font, text, LIGHT_GRAY)
+        rect = self.game.screen.blit(stats_text, (20, SCREEN_HEIGHT - 30))
+        self.track('input_stats', text, rect)
+    
+    def draw_profiler_overlay(self):
+        """Draw per-phase frame-time statistics, a frame-time graph and counters."""
+        screen = self.game.screen
+        profiler = self.profiler
+        rect = self.overlay_rect
+        if self.frame_count % 15 == 0 or not self.profiler_stats:
+            self.profiler_stats = profiler.stats()
+        stats = self.profiler_stats
+        if self.overlay_background is None:
+            self.overlay_background = pygame.Surface(rect.size, pygame.SRCALPHA)
+            self.overlay_background.fill((0, 0, 0, 190))
+        screen.blit(self.overlay_background, rect.topleft)
+        self.track('profiler', self.frame_count, rect)
+        x, y = rect.x + 10, rect.y + 8
+        header = "PROFILER (F6: export CSV)" if profiler.enabled else "PROFILER (disabled)"
+        screen.blit(self.text(self.small_font, header, CYAN), (x, y))
+        y += 24
+        screen.blit(self.text(self.small_font, "phase            mean    p95    p99 ms", LIGHT_GRAY), (x, y))
+        y += 22
+        phases = sorted(stats.items(), key=lambda item: (item[0] != 'frame', -item[1]['mean']))
+        for name, row in phases[:14]:
+            line = f"{name[:16]:<16} {row['mean']:6.2f} {row['p95']:6.2f} {row['p99']:6.2f}"
+            screen.blit(self.text(self.small_font, line, YELLOW if name == 'frame' else WHITE), (x, y))
+            y += 20
+        # Frame-time graph of the most recent frames, 33 ms full scale
+        graph = pygame.Rect(x, rect.bottom - 150, rect.width - 20, 80)
+        pygame.draw.rect(screen, DARK_GRAY, graph)
+        target_y = graph.bottom - int(graph.height * (1000 / 60) / 33.3)
+        pygame.draw.line(screen, GREEN, (graph.x, target_y), (graph.right - 1, target_y))
+        times = profiler.recent(profiler.frame_times)[-graph.width // 2:] * 1000
+        if len(times) > 1:
+            heights = (graph.bottom - (times.clip(0, 33.3) / 33.3 * graph.height)).astype(int).tolist()
+            points = [(graph.x + i * 2, h) for i, h in enumerate(heights)]
+            pygame.draw.lines(screen, YELLOW, False, points)
+        # Counters
+        y = graph.bottom + 8
+        counters = (f"particles {len(self.game.particles)}   sprite allocs {self.particle_sprites.allocations}",
+                    f"text renders {self.text_cache.misses}   frames {profiler.frames}")
+        for line in counters:
+            screen.blit(self.text(self.small_font, line, LIGHT_GRAY), (x, y))
+            y += 20
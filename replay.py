@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+
+"""Compact binary replays: recording, headless verification and seeking.
+
+A replay holds a game's seed and mode plus every action the engine applied
+with its clock tick. Since the engine is deterministic given its seed and a
+timed action stream, that is enough to reproduce the game exactly.
+
+File layout (little endian)::
+
+    header   b'TRPL', version u8, game mode u8, seed u64, start tick u64,
+             board width u16, board height u16 (version 1 files: 10x20, no size)
+    records  varint(delta_tick << 3 | code)
+               code 1-6  Action value
+               code 0    marker byte follows:
+                           1 keyframe: varint length + zlib-compressed JSON
+                             of TetrisEngine.snapshot() taken before the
+                             next action
+                           2 end of game
+
+``delta_tick`` is milliseconds since the previous record, so a typical
+action costs one or two bytes. Keyframes every ``keyframe_interval`` pieces
+let playback seek without simulating from the start. A resumed game's
+replay opens with a keyframe at the start tick, which playback starts from.
+
+    python replay.py replays/replay_20240101_120000_1a2b3c4d.ttr        # verify at max speed
+    python replay.py replays/replay_20240101_120000_1a2b3c4d.ttr --seek 60000
+"""
+
+import argparse
+import bisect
+import json
+import os
+import struct
+import time
+import zlib
+from constants import REPLAY_KEYFRAME_INTERVAL, REPLAY_FLUSH_BYTES, GRID_WIDTH, GRID_HEIGHT
+from enums import GameMode, Action
+from engine import TetrisEngine
+from storage import BackgroundWriter
+
+MAGIC = b'TRPL'
+VERSION = 2
+HEADER = struct.Struct('<4sBBQQHH')
+HEADER_V1 = struct.Struct('<4sBBQQ')
+MARKER_KEYFRAME = 1
+MARKER_END = 2
+
+def write_varint(buffer, value):
+    """Append an unsigned LEB128 varint"""
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def read_varint(data, pos):
+    """Decode a varint at ``pos``; returns ``(value, next_pos)``"""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class Recorder:
+    """Records every game an engine plays to its own replay file.
+
+    Listens to engine events: 'game_started' opens a new file,
+    'game_resumed' opens one starting with a keyframe, 'action' appends a
+    record and 'piece_locked' counts pieces towards the next keyframe.
+    Records accumulate in memory and are handed to a ``BackgroundWriter`` in
+    chunks of ``flush_bytes``, so recording costs a few bytes of appending
+    per input and never touches the disk on the caller's thread. A game is
+    written to ``<name>.part`` and renamed to ``<name>`` when it ends.
+    """
+    def __init__(self, engine, directory='replays', keyframe_interval=REPLAY_KEYFRAME_INTERVAL,
+                 flush_bytes=REPLAY_FLUSH_BYTES, writer=None):
+        self.engine = engine
+        self.directory = directory
+        self.keyframe_interval = keyframe_interval
+        self.flush_bytes = flush_bytes
+        self.owns_writer = writer is None
+        self.writer = writer or BackgroundWriter()
+        self.buffer = bytearray()
+        self.part_path = None  # file being written, None between games
+        self.directory_missing = True
+        self.path = None
+        self.last_tick = 0
+        self.pieces = 0
+        engine.add_listener(self.on_engine_event)
+
+    def detach(self):
+        """Stop recording: close the current replay and stop listening"""
+        self.close()
+        self.engine.remove_listener(self.on_engine_event)
+        if self.owns_writer:
+            self.writer.close()
+
+    def on_engine_event(self, event, **data):
+        if event == 'game_started':
+            self.start(data['seed'], data['game_mode'])
+        elif event == 'game_resumed':
+            self.start(data['seed'], data['game_mode'])
+            self.write_keyframe()
+        elif self.part_path is None:
+            return
+        elif event == 'action':
+            if self.pieces >= self.keyframe_interval:
+                self.write_keyframe()
+            self.write_record(data['action'].value)
+        elif event == 'piece_locked':
+            self.pieces += 1
+
+    def start(self, seed, game_mode):
+        """Finish the current replay (if any) and open a new one"""
+        self.close()
+        if self.directory_missing:
+            os.makedirs(self.directory, exist_ok=True)
+            self.directory_missing = False
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        self.path = os.path.join(self.directory, f'replay_{stamp}_{seed:08x}.ttr')
+        self.part_path = self.path + '.part'
+        self.last_tick = self.engine.clock()
+        self.pieces = 0
+        board = self.engine.board
+        self.buffer += HEADER.pack(MAGIC, VERSION, game_mode.value, seed, self.last_tick,
+                                   board.width, board.height)
+
+    def write_record(self, code):
+        tick = self.engine.clock()
+        write_varint(self.buffer, (tick - self.last_tick) << 3 | code)
+        self.last_tick = tick
+        if len(self.buffer) >= self.flush_bytes:
+            self.flush()
+
+    def write_keyframe(self):
+        payload = zlib.compress(json.dumps(self.engine.snapshot(), separators=(',', ':')).encode())
+        self.write_record(0)
+        self.buffer.append(MARKER_KEYFRAME)
+        write_varint(self.buffer, len(payload))
+        self.buffer += payload
+        self.pieces = 0
+
+    def flush(self):
+        if self.part_path is not None and self.buffer:
+            self.writer.append(self.part_path, bytes(self.buffer))
+            self.buffer.clear()
+
+    def close(self):
+        """Write the end marker and finish the current replay file"""
+        if self.part_path is None:
+            return
+        self.write_record(0)
+        self.buffer.append(MARKER_END)
+        self.flush()
+        self.writer.rename(self.part_path, self.path)
+        self.part_path = None
+
+class Replay:
+    """A decoded replay: header fields, timed actions and keyframes"""
+    def __init__(self, game_mode, seed, start_tick, events, keyframes, end_tick,
+                 size=(GRID_WIDTH, GRID_HEIGHT)):
+        self.game_mode = game_mode
+        self.size = size  # board (width, height)
+        self.seed = seed
+        self.start_tick = start_tick
+        self.events = events        # [(tick, Action)]
+        self.keyframes = keyframes  # [(tick, event_index, snapshot)]
+        self.end_tick = end_tick
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.parse(f.read())
+
+    @classmethod
+    def parse(cls, data):
+        magic, version, mode, seed, start_tick = HEADER_V1.unpack_from(data)
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError("Not a replay file or unsupported replay version")
+        if version == 1:
+            board_size = (GRID_WIDTH, GRID_HEIGHT)
+            pos = HEADER_V1.size
+        else:
+            board_size = HEADER.unpack_from(data)[5:]
+            pos = HEADER.size
+        events = []
+        keyframes = []
+        tick = start_tick
+        # A replay cut short (e.g. the game crashed) simply ends early
+        while pos < len(data):
+            value, pos = read_varint(data, pos)
+            tick += value >> 3
+            code = value & 7
+            if code:
+                events.append((tick, Action(code)))
+                continue
+            marker = data[pos]
+            pos += 1
+            if marker == MARKER_KEYFRAME:
+                size, pos = read_varint(data, pos)
+                snapshot = json.loads(zlib.decompress(data[pos:pos + size]))
+                keyframes.append((tick, len(events), snapshot))
+                pos += size
+            elif marker == MARKER_END:
+                break
+        end_tick = max(tick, events[-1][0] if events else start_tick)
+        return cls(GameMode(mode), seed, start_tick, events, keyframes, end_tick, board_size)
+
+class ReplayPlayer:
+    """Drives an engine through a replay.
+
+    The engine's clock must be a ``SimulationClock`` (the default). Between
+    actions the engine is updated first and the action applied second, the
+    same order the game loop uses, so gravity lands identically.
+    """
+    def __init__(self, replay, engine=None):
+        self.replay = replay
+        self.engine = engine if engine is not None else TetrisEngine()
+        self.position = 0
+        self.restart()
+
+    @property
+    def time(self):
+        return self.engine.clock()
+
+    @property
+    def finished(self):
+        return self.position >= len(self.replay.events) and self.time >= self.replay.end_tick
+
+    def restart(self):
+        """Return to the first tick of the game"""
+        keyframes = self.replay.keyframes
+        if keyframes and keyframes[0][:2] == (self.replay.start_tick, 0):
+            # A resumed game starts from its saved state
+            self.engine.restore(keyframes[0][2])
+        else:
+            self.engine.clock.time = self.replay.start_tick
+            self.engine.start_game(self.replay.game_mode, self.replay.seed, self.replay.size)
+        self.position = 0
+
+    def run_until(self, tick):
+        """Apply every action up to ``tick`` and advance the clock to it"""
+        tick = min(tick, self.replay.end_tick)
+        events = self.replay.events
+        engine = self.engine
+        while self.position < len(events) and events[self.position][0] <= tick:
+            event_tick, action = events[self.position]
+            engine.clock.time = event_tick
+            engine.update()
+            engine.apply(action)
+            self.position += 1
+        if tick > engine.clock():
+            engine.clock.time = tick
+        engine.update()
+
+    def seek(self, tick):
+        """Jump to ``tick`` from the nearest keyframe at or before it"""
+        keyframes = self.replay.keyframes
+        index = bisect.bisect_right([frame[0] for frame in keyframes], tick) - 1
+        if index >= 0 and (keyframes[index][0] > self.time or tick < self.time):
+            frame_tick, position, snapshot = keyframes[index]
+            self.engine.restore(snapshot)
+            self.position = position
+        elif tick < self.time:
+            self.restart()
+        self.run_until(tick)
+
+    def finish(self):
+        """Play to the end at maximum speed"""
+        self.run_until(self.replay.end_tick)
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify or inspect a replay at maximum speed")
+    parser.add_argument('path')
+    parser.add_argument('--seek', type=int, help="stop at this tick (ms of game time) instead of the end")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    start = time.perf_counter()
+    player = ReplayPlayer(replay)
+    if args.seek is not None:
+        player.seek(replay.start_tick + args.seek)
+    else:
+        player.finish()
+    seconds = time.perf_counter() - start
+    engine = player.engine
+    print(f"{replay.game_mode.name} seed {replay.seed}: {len(replay.events)} actions, "
+          f"{len(replay.keyframes)} keyframes, {(replay.end_tick - replay.start_tick) / 1000:.1f}s of play")
+    print(f"At {(player.time - replay.start_tick) / 1000:.1f}s: score {engine.score}, lines {engine.lines_cleared}, "
+          f"level {engine.level}, {engine.state.name} (simulated in {seconds * 1000:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+
+"""Spectator wall: many bot games or replays side by side in scaled tiles.
+
+Each tile owns a board surface that is repainted, from one shared
+CellSprites cache, only when its board's version changes; every frame just
+blits the cached surfaces and draws the falling pieces on top. Simulation
+runs under a per-frame time budget: tiles are updated round-robin until the
+budget is spent and the rest wait for the next frame, so under load each
+board updates less often while the frame rate holds. A board that waits
+catches up on the game time it missed (up to ``SPECTATOR_MAX_STEP``).
+
+    python spectator.py                          # 16 bot games
+    python spectator.py --boards 25 --budget 4
+    python spectator.py replays/*.ttr            # one tile per replay
+    python spectator.py --frames 600             # run 600 frames, print timings
+"""
+
+import argparse
+import math
+import os
+import time
+import pygame
+from constants import *
+from enums import GameMode
+from engine import TetrisEngine
+from bot import BeamSearchBot
+from replay import Replay, ReplayPlayer
+from renderer import CellSprites, TextCache
+
+LABEL_HEIGHT = 18
+TILE_PADDING = 6
+FOOTER_HEIGHT = 28
+
+class BotFeed:
+    """A headless bot game that starts over with a new seed once it ends"""
+    def __init__(self, seed, seed_step=1, game_mode=GameMode.AUTOPLAY):
+        self.engine = TetrisEngine(game_mode)
+        self.bot = BeamSearchBot(beam_width=SPECTATOR_BEAM_WIDTH, depth=1)
+        self.seed_step = seed_step
+        self.start(seed)
+
+    def start(self, seed):
+        self.engine.start_game(seed=seed)
+        self.next_move = self.engine.clock() + SPECTATOR_PIECE_DELAY
+        self.over_at = None
+
+    @property
+    def label(self):
+        return f"bot {self.engine.seed}"
+
+    def advance(self, dt):
+        """Run ``dt`` ms of game time, placing at most one piece"""
+        engine = self.engine
+        engine.clock.advance(dt)
+        now = engine.clock()
+        if self.over_at is not None:
+            if now - self.over_at >= SPECTATOR_RESTART_DELAY:
+                self.start(engine.seed + self.seed_step)
+            return
+        engine.update()
+        if now >= self.next_move and not engine.is_over:
+            self.bot.play_piece(engine)
+            self.next_move = now + SPECTATOR_PIECE_DELAY
+        if engine.is_over:
+            self.over_at = now
+
+class ReplayFeed:
+    """Plays a replay file in game time, starting over once it ends"""
+    def __init__(self, path):
+        self.player = ReplayPlayer(Replay.load(path))
+        self.engine = self.player.engine
+        self.label = os.path.splitext(os.path.basename(path))[0]
+        self.idle = 0
+
+    def advance(self, dt):
+        player = self.player
+        if player.finished:
+            self.idle += dt
+            if self.idle >= SPECTATOR_RESTART_DELAY:
+                player.restart()
+                self.idle = 0
+            return
+        player.run_until(player.time + dt)
+
+class Tile:
+    """One feed's place on the wall and its cached board surface"""
+    def __init__(self, feed, rect):
+        self.feed = feed
+        self.rect = rect  # whole tile: label line above the board
+        self.cell = 0
+        self.origin = (0, 0)
+        self.view_y = 0
+        self.view_cols = self.view_rows = 0
+        self.surface = None
+        self.painted = None  # (board, version, view_y) the surface shows
+        self.last_update = None  # game clock ms of the last update
+        self.update_rate = 0.0  # smoothed updates per second
+
+    def fit(self, board):
+        """Scale the board to the tile; huge boards show a window of rows"""
+        area_w = self.rect.width - 2 * TILE_PADDING
+        area_h = self.rect.height - LABEL_HEIGHT - 2 * TILE_PADDING
+        cell = max(1, min(area_w // board.width, area_h // board.height))
+        self.cell = cell
+        self.view_cols = min(board.width, area_w // cell)
+        self.view_rows = min(board.height, area_h // cell)
+        width, height = self.view_cols * cell, self.view_rows * cell
+        self.origin = (self.rect.x + (self.rect.width - width) // 2,
+                       self.rect.y + LABEL_HEIGHT + TILE_PADDING)
+        self.surface = pygame.Surface((width, height)).convert()
+        self.surface.set_colorkey(BOARD_COLORKEY)
+        self.painted = None
+
+    def follow(self, board, piece):
+        """Row the window starts at: the falling piece or stack top stays in view"""
+        if self.view_rows >= board.height:
+            return 0
+        top = min(board.tops)
+        if piece is not None:
+            top = min(top, max(0, piece.y))
+        return max(0, min(board.height - self.view_rows, top - 2))
+
+class SpectatorView:
+    """Lays feeds out in a grid of tiles and draws them on ``screen``"""
+    def __init__(self, screen, feeds, budget_ms=SPECTATOR_BUDGET_MS):
+        self.screen = screen
+        self.budget = budget_ms / 1000
+        self.sprites = CellSprites()
+        self.text_cache = TextCache()
+        self.font = pygame.font.Font(None, 20)
+        self.tiles = self.layout(feeds)
+        self.empty_rows = {}  # (cell, cols) -> strip of empty cells
+        self.next_tile = 0
+        self.updates_last_frame = 0
+        self.static_layer = self.draw_static()
+
+    def layout(self, feeds):
+        """Pick the column count that gives the largest cells"""
+        count = len(feeds)
+        width = SCREEN_WIDTH
+        height = SCREEN_HEIGHT - FOOTER_HEIGHT
+        board_w = max(feed.engine.board.width for feed in feeds)
+        board_h = max(feed.engine.board.height for feed in feeds)
+        best = None
+        for columns in range(1, count + 1):
+            rows = math.ceil(count / columns)
+            tile_w, tile_h = width // columns, height // rows
+            cell = min((tile_w - 2 * TILE_PADDING) / board_w,
+                       (tile_h - LABEL_HEIGHT - 2 * TILE_PADDING) / board_h)
+            if best is None or cell > best[0]:
+                best = (cell, columns, tile_w, tile_h)
+        _, columns, tile_w, tile_h = best
+        tiles = []
+        for i, feed in enumerate(feeds):
+            row, column = divmod(i, columns)
+            tile = Tile(feed, pygame.Rect(column * tile_w, row * tile_h, tile_w, tile_h))
+            tile.fit(feed.engine.board)
+            tiles.append(tile)
+        return tiles
+
+    def draw_static(self):
+        """Background and board frames, drawn once"""
+        layer = pygame.Surface(self.screen.get_size()).convert()
+        layer.fill(BLACK)
+        for tile in self.tiles:
+            frame = pygame.Rect(tile.origin, tile.surface.get_size()).inflate(4, 4)
+            pygame.draw.rect(layer, DARK_GRAY, frame)
+            pygame.draw.rect(layer, GRAY, frame, 1)
+        return layer
+
+    def get_empty_row(self, tile):
+        key = (tile.cell, tile.view_cols)
+        strip = self.empty_rows.get(key)
+        if strip is None:
+            cell = tile.cell
+            strip = self.empty_rows[key] = pygame.Surface((tile.view_cols * cell, cell)).convert()
+            sprite = self.sprites.get(None, cell)
+            strip.blits([(sprite, (x * cell, 0)) for x in range(tile.view_cols)], False)
+        return strip
+
+    def paint(self, tile):
+        """Repaint a tile's board surface if its board or window changed"""
+        engine = tile.feed.engine
+        board = engine.board
+        if tile.painted is not None and tile.painted[0] is not board:
+            # A new game on a different board size
+            tile.fit(board)
+            self.static_layer = self.draw_static()
+        view_y = tile.follow(board, engine.current_piece)
+        if tile.painted == (board, board.version, view_y):
+            return
+        cell = tile.cell
+        surface = tile.surface
+        sprite = self.sprites.get
+        empty_row = self.get_empty_row(tile)
+        blits = []
+        for row in range(tile.view_rows):
+            y = view_y + row
+            top = row * cell
+            if not board.rows[y]:
+                blits.append((empty_row, (0, top)))
+                continue
+            colors = board.cells[y]
+            blits.extend((sprite(colors[x], cell), (x * cell, top)) for x in range(tile.view_cols))
+        surface.fill(BOARD_COLORKEY)
+        surface.blits(blits, False)
+        tile.view_y = view_y
+        tile.painted = (board, board.version, view_y)
+
+    def update(self):
+        """Advance tiles round-robin until this frame's budget is spent.
+
+        At least one tile is updated per frame, so every board keeps moving
+        however slow the machine.
+        """
+        tiles = self.tiles
+        deadline = time.perf_counter() + self.budget
+        now = pygame.time.get_ticks()
+        updated = 0
+        while updated < len(tiles):
+            tile = tiles[self.next_tile]
+            self.next_tile = (self.next_tile + 1) % len(tiles)
+            if tile.last_update is not None:
+                dt = now - tile.last_update
+                if dt <= 0:
+                    break  # every tile is already current for this tick
+                tile.feed.advance(min(dt, SPECTATOR_MAX_STEP))
+                tile.update_rate += (1000 / dt - tile.update_rate) * 0.1
+            tile.last_update = now
+            self.paint(tile)
+            updated += 1
+            if time.perf_counter() >= deadline:
+                break
+        self.updates_last_frame = updated
+
+    def draw(self, fps=0.0):
+        screen = self.screen
+        screen.blit(self.static_layer, (0, 0))
+        text = self.text_cache.render
+        font = self.font
+        blits = []
+        for tile in self.tiles:
+            engine = tile.feed.engine
+            blits.append((tile.surface, tile.origin))
+            color = GRAY if engine.is_over else LIGHT_GRAY
+            blits.append((text(font, f"{tile.feed.label}  {engine.score:,}", color), tile.rect.move(TILE_PADDING, 4)))
+            piece = engine.current_piece
+            if piece is None or engine.is_over:
+                continue
+            cell = tile.cell
+            sprite = self.sprites.get(piece.color, cell, WHITE, max(1, cell // 16), keyed=True)
+            left, top = tile.origin
+            for x, y in piece.get_positions():
+                row = y - tile.view_y
+                if 0 <= row < tile.view_rows and x < tile.view_cols:
+                    blits.append((sprite, (left + x * cell, top + row * cell)))
+        stats = self.stats()
+        footer = (f"{len(self.tiles)} boards   {fps:.0f} FPS   "
+                  f"{stats['updates_per_second']:.0f} updates/s per board "
+                  f"(min {stats['min_updates_per_second']:.0f})   "
+                  f"{self.updates_last_frame} boards this frame")
+        blits.append((text(font, footer, LIGHT_GRAY), (TILE_PADDING, SCREEN_HEIGHT - FOOTER_HEIGHT + 8)))
+        screen.blits(blits, False)
+
+    def stats(self):
+        """Mean and lowest smoothed per-board update rate"""
+        rates = [tile.update_rate for tile in self.tiles]
+        return {'updates_per_second': sum(rates) / len(rates), 'min_updates_per_second': min(rates)}
+
+def run(feeds, fps=SPECTATOR_FPS, budget_ms=SPECTATOR_BUDGET_MS, frames=None):
+    """Show the wall until closed (or for ``frames`` frames); returns frame times in ms"""
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Tetris - Spectator")
+    view = SpectatorView(screen, feeds, budget_ms)
+    clock = pygame.time.Clock()
+    frame_times = []
+    running = True
+    while running and (frames is None or len(frame_times) < frames):
+        clock.tick(fps)
+        start = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+        view.update()
+        view.draw(clock.get_fps())
+        pygame.display.flip()
+        frame_times.append((time.perf_counter() - start) * 1000)
+    stats = view.stats()
+    pygame.quit()
+    return frame_times, stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Show many bot games or replays at once")
+    parser.add_argument('replays', nargs='*', help="replay files to show instead of bot games")
+    parser.add_argument('--boards', type=int, default=SPECTATOR_BOARDS, help="number of bot games")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first bot game")
+    parser.add_argument('--fps', type=int, default=SPECTATOR_FPS)
+    parser.add_argument('--budget', type=float, default=SPECTATOR_BUDGET_MS,
+                        help="milliseconds of simulation per frame")
+    parser.add_argument('--frames', type=int, help="stop after this many frames and print timings")
+    args = parser.parse_args()
+
+    if args.replays:
+        feeds = [ReplayFeed(path) for path in args.replays]
+    else:
+        feeds = [BotFeed(args.seed + i, args.boards) for i in range(args.boards)]
+    frame_times, stats = run(feeds, args.fps, args.budget, args.frames)
+    if args.frames and frame_times:
+        ordered = sorted(frame_times)
+        print(f"{len(feeds)} boards, {len(frame_times)} frames: mean {sum(ordered) / len(ordered):.2f} ms, "
+              f"p95 {ordered[int(len(ordered) * 0.95)]:.2f} ms, max {ordered[-1]:.2f} ms of work per frame")
+        print(f"Board updates: {stats['updates_per_second']:.1f}/s mean, "
+              f"{stats['min_updates_per_second']:.1f}/s slowest board")
+
+if __name__ == "__main__":
+    main()
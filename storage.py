@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+"""Persistent leaderboards, session history and saved games, written off the frame loop.
+
+All disk writes go through a BackgroundWriter thread. Leaderboards live in a
+small JSON file that is atomically replaced (write to a temporary file,
+fsync, ``os.replace``), so a crash leaves either the old or the new file.
+Every finished game is appended as one JSON line to a session log that is
+never read at startup, so startup cost does not grow with history. The game
+in progress is kept in a save file the same way, so it survives a crash.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import warnings
+
+class BackgroundWriter:
+    """Daemon thread that performs file writes in batches.
+
+    ``replace``, ``append``, ``rename`` and ``remove`` only enqueue work.
+    The thread drains whatever has queued up, keeps only the last
+    ``replace`` or ``remove`` per path, joins appends per path into one
+    write and fsyncs once per file per batch. Renames run last, after the
+    batch's appends.
+    """
+    def __init__(self, batch_delay=0.05):
+        self.batch_delay = batch_delay
+        self.queue = queue.Queue()
+        self.errors = []
+        self.thread = threading.Thread(target=self.run, name='BackgroundWriter', daemon=True)
+        self.thread.start()
+
+    def replace(self, path, data):
+        """Atomically replace ``path`` with ``data``.
+
+        ``data`` is str, bytes or a function returning either; a function is
+        only called on the writer thread, and not at all if a later replace
+        of the same path supersedes it.
+        """
+        self.queue.put(('replace', path, data))
+
+    def remove(self, path):
+        """Delete ``path`` (after any writes to it queued before)"""
+        self.queue.put(('replace', path, None))
+
+    def append(self, path, data):
+        """Append ``data`` (str or bytes) to ``path``"""
+        self.queue.put(('append', path, data))
+
+    def rename(self, path, new_path):
+        """Atomically move ``path`` to ``new_path`` once earlier writes to it are done"""
+        self.queue.put(('rename', path, new_path))
+
+    def flush(self):
+        """Block until everything queued so far is on disk"""
+        done = threading.Event()
+        self.queue.put(('flush', None, done))
+        done.wait()
+
+    def close(self):
+        """Write out pending work and stop the thread"""
+        if self.thread.is_alive():
+            self.queue.put(('stop', None, None))
+            self.thread.join()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Give bursts of writes a moment to coalesce into one batch
+            time.sleep(self.batch_delay)
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            replaces = {}
+            appends = {}
+            renames = []
+            waiters = []
+            stop = False
+            for op, path, data in batch:
+                if op == 'replace':
+                    replaces[path] = data
+                    appends.pop(path, None)
+                elif op == 'append':
+                    appends.setdefault(path, []).append(data)
+                elif op == 'rename':
+                    renames.append((path, data))
+                elif op == 'flush':
+                    waiters.append(data)
+                elif op == 'stop':
+                    stop = True
+            for path, data in replaces.items():
+                self.guard(self.write_atomic if data is not None else self.delete, path, data)
+            for path, chunks in appends.items():
+                self.guard(self.write_append, path, chunks)
+            for path, new_path in renames:
+                self.guard(os.replace, path, new_path)
+            for done in waiters:
+                done.set()
+            if stop:
+                return
+
+    def guard(self, write, path, data):
+        try:
+            write(path, data)
+        except OSError as error:
+            # Keep the game running; the failure is reported by ScoreStore
+            self.errors.append((path, error))
+
+    @staticmethod
+    def write_atomic(path, data):
+        if callable(data):
+            data = data()
+        mode = 'wb' if isinstance(data, bytes) else 'w'
+        temp = f"{path}.tmp"
+        with open(temp, mode) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+
+    @staticmethod
+    def delete(path, data=None):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def write_append(path, chunks):
+        binary = isinstance(chunks[0], bytes)
+        with open(path, 'ab' if binary else 'a') as f:
+            f.write((b'' if binary else '').join(chunks))
+            f.flush()
+            os.fsync(f.fileno())
+
+class ScoreStore:
+    """Per-mode top-N leaderboards plus an append-only session log.
+
+    ``record_game`` updates the in-memory leaderboard at once and queues the
+    disk writes, so it is safe to call from the frame loop.
+    """
+    def __init__(self, directory='.', leaderboard_file='high_scores.json',
+                 sessions_file='sessions.jsonl', size=10, writer=None):
+        self.size = size
+        self.leaderboard_path = os.path.join(directory, leaderboard_file)
+        self.sessions_path = os.path.join(directory, sessions_file)
+        self.writer = writer or BackgroundWriter()
+        self.leaderboards = {}
+        self.sessions_recorded = 0
+        self.load()
+
+    def load(self):
+        """Read the leaderboard file, migrating the old ``{mode: score}`` format.
+
+        A missing file starts empty. A corrupt file is set aside as
+        ``<name>.corrupt`` with a warning instead of being overwritten.
+        """
+        try:
+            with open(self.leaderboard_path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as error:
+            warnings.warn(f"Could not read {self.leaderboard_path} ({error}); starting with empty leaderboards")
+            try:
+                os.replace(self.leaderboard_path, self.leaderboard_path + '.corrupt')
+            except OSError:
+                pass
+            return
+        if 'leaderboards' in data:
+            self.leaderboards = data['leaderboards']
+            self.sessions_recorded = data.get('sessions_recorded', 0)
+        else:
+            # Original format: one best score per mode
+            self.leaderboards = {mode: [{'score': score}] for mode, score in data.items() if score}
+
+    def best(self, mode):
+        """Best score recorded for a mode (its lowercase name), or 0"""
+        board = self.leaderboards.get(mode)
+        return board[0]['score'] if board else 0
+
+    def qualifies(self, mode, score):
+        board = self.leaderboards.get(mode, [])
+        return score > 0 and (len(board) < self.size or score > board[-1]['score'])
+
+    def record_game(self, mode, score, leaderboard=True, **stats):
+        """Log a finished game and enter it in the mode's leaderboard if it ranks.
+
+        ``stats`` (lines, level, duration and so on) are stored with the
+        entry. Returns the leaderboard rank (0 = best) or None.
+        """
+        entry = {'score': score, 'date': time.strftime('%Y-%m-%dT%H:%M:%S'), **stats}
+        self.sessions_recorded += 1
+        self.writer.append(self.sessions_path, json.dumps({'mode': mode, **entry}) + '\n')
+        rank = None
+        if leaderboard and self.qualifies(mode, score):
+            board = self.leaderboards.setdefault(mode, [])
+            rank = next((i for i, other in enumerate(board) if score > other['score']), len(board))
+            board.insert(rank, entry)
+            del board[self.size:]
+        self.save()
+        return rank
+
+    def save(self):
+        data = {'version': 2, 'sessions_recorded': self.sessions_recorded, 'leaderboards': self.leaderboards}
+        self.writer.replace(self.leaderboard_path, json.dumps(data))
+
+    def sessions(self):
+        """Read the whole session history (not needed at startup)"""
+        try:
+            with open(self.sessions_path) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def close(self):
+        """Flush pending writes and stop the writer thread"""
+        self.writer.close()
+        for path, error in self.writer.errors:
+            warnings.warn(f"Could not write {path}: {error}")
+
+class SaveSlot:
+    """The game in progress, kept on disk so it can be resumed after a crash.
+
+    ``save`` takes a ``TetrisEngine.snapshot()`` dict, which the caller
+    must not modify afterwards; it is serialized on the writer thread, and
+    only the newest of several queued snapshots is written.
+    """
+    def __init__(self, path='savegame.json', writer=None):
+        self.path = path
+        self.writer = writer or BackgroundWriter()
+
+    def save(self, snapshot):
+        data = {'version': 1, 'snapshot': snapshot}
+        self.writer.replace(self.path, lambda: json.dumps(data, separators=(',', ':')))
+
+    def clear(self):
+        self.writer.remove(self.path)
+
+    def load(self):
+        """The saved snapshot, or None. A corrupt save is set aside with a warning."""
+        try:
+            with open(self.path) as f:
+                return json.load(f)['snapshot']
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            warnings.warn(f"Could not read {self.path} ({error}); discarding the saved game")
+            try:
+                os.replace(self.path, self.path + '.corrupt')
+            except OSError:
+                pass
+            return None
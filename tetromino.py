@@ -1,46 +1,86 @@
 # -*- coding: utf-8 -*-
 
 import random
+from collections import namedtuple
 from constants import TETROMINOS, TETROMINO_COLORS, GRID_WIDTH
 
+# Precomputed geometry for one rotation of one shape.
+#   cells      -- (dx, dy) offsets of the filled cells inside the 5x5 box
+#   left/right -- first and last filled column of the box
+#   top/bottom -- first and last filled row of the box
+#   row_masks  -- (dy, left, right, bits) per filled row, bit 0 = column ``left``
+#   bottoms    -- (dx, dy) of the lowest filled cell in each filled column
+#   spawn_dx   -- box column offset that centres the piece on the board
+Rotation = namedtuple('Rotation', 'cells left right top bottom row_masks bottoms spawn_dx')
+
+def build_rotation(shape):
+    """Parse one ASCII shape from constants.TETROMINOS into a Rotation"""
+    cells = tuple((j, i) for i, row in enumerate(shape)
+                  for j, cell in enumerate(row) if cell == '#')
+    columns = [dx for dx, _ in cells]
+    rows = [dy for _, dy in cells]
+    row_masks = []
+    for i in sorted(set(rows)):
+        row_columns = [dx for dx, dy in cells if dy == i]
+        left = min(row_columns)
+        bits = sum(1 << (j - left) for j in row_columns)
+        row_masks.append((i, left, max(row_columns), bits))
+    bottoms = tuple((j, max(dy for dx, dy in cells if dx == j)) for j in sorted(set(columns)))
+    spawn_dx = -(len(shape[0]) // 2)
+    return Rotation(cells, min(columns), max(columns), min(rows), max(rows),
+                    tuple(row_masks), bottoms, spawn_dx)
+
+# shape_type -> tuple of Rotation, built once at import
+SHAPES = {shape_type: tuple(build_rotation(shape) for shape in rotations)
+          for shape_type, rotations in TETROMINOS.items()}
+
 class Tetromino:
-    def __init__(self, shape_type):
+    def __init__(self, shape_type, board_width=GRID_WIDTH):
         self.shape_type = shape_type
+        self.board_width = board_width  # pieces spawn centred on a board this wide
+        self.rotations = SHAPES[shape_type]
         self.rotation = 0
-        self.x = GRID_WIDTH // 2 - 2
-        self.y = 0
-        self.shape = TETROMINOS[shape_type][self.rotation]
+        self.reset_position()
         self.color = TETROMINO_COLORS[shape_type]
-    
+
+    @property
+    def shape(self):
+        """ASCII rows of the current rotation"""
+        return TETROMINOS[self.shape_type][self.rotation]
+
+    @property
+    def data(self):
+        """Precomputed Rotation entry for the current rotation"""
+        return self.rotations[self.rotation]
+
     def rotate(self):
-        self.rotation = (self.rotation + 1) % len(TETROMINOS[self.shape_type])
-        self.shape = TETROMINOS[self.shape_type][self.rotation]
-    
+        self.rotation = (self.rotation + 1) % len(self.rotations)
+
     def get_positions(self):
-        positions = []
-        for i, row in enumerate(self.shape):
-            for j, cell in enumerate(row):
-                if cell == '#':
-                    positions.append((self.x + j, self.y + i))
-        return positions
-    
+        x, y = self.x, self.y
+        return [(x + dx, y + dy) for dx, dy in self.rotations[self.rotation].cells]
+
+    def get_row_masks(self):
+        """Per-row ``(dy, left, right, bits)`` masks used by Board.collides"""
+        return self.rotations[self.rotation].row_masks
+
     def move(self, dx, dy):
         self.x += dx
         self.y += dy
-    
+
     def reset_position(self):
-        self.x = GRID_WIDTH // 2 - 2
+        self.x = self.board_width // 2 + self.rotations[self.rotation].spawn_dx
         self.y = 0
-    
+
     def copy(self):
-        new_piece = Tetromino(self.shape_type)
+        new_piece = Tetromino(self.shape_type, self.board_width)
         new_piece.rotation = self.rotation
         new_piece.x = self.x
         new_piece.y = self.y
-        new_piece.shape = self.shape
         return new_piece
 
-def create_random_tetromino():
-    """Create a random tetromino piece"""
-    shape_type = random.choice(list(TETROMINOS.keys()))
-    return Tetromino(shape_type) 
\ No newline at end of file
+SHAPE_TYPES = tuple(TETROMINOS)
+
+def create_random_tetromino(rng=random, board_width=GRID_WIDTH):
+    """Create a random tetromino piece, drawing from ``rng`` (a random.Random)"""
+    return Tetromino(rng.choice(SHAPE_TYPES), board_width)
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""Self-play tournament runner for tuning rule constants and bot weights.
+
+Plays seeded headless games with the autoplay bot across a process pool and
+streams one JSON line per game to disk as workers finish. A configuration
+file lists named variants to compare, for example::
+
+    [
+        {"name": "default"},
+        {"name": "fast", "rules": {"speed_increase_per_level": 100, "lines_per_level": 5}},
+        {"name": "flat", "rules": {"line_scores": {"1": 100, "2": 200, "3": 300, "4": 400}}},
+        {"name": "careful", "weights": {"holes": -0.6}, "beam_width": 4}
+    ]
+
+``rules`` are GameLogic rule attributes (the lowercase names of the constants
+in constants.py), ``weights``, ``beam_width`` and ``depth`` configure the bot.
+Game ``i`` of a run uses seed ``seed + i`` for every variant, so variants are
+compared on identical piece sequences.
+
+    python tournament.py --games 200 --config variants.json --output results.jsonl
+    python tournament.py --games 64 --scaling 1,2,4,8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from constants import AUTOPLAY_BEAM_WIDTH, AUTOPLAY_DEPTH, AUTOPLAY_PIECE_DELAY
+from enums import GameMode
+from engine import TetrisEngine
+from bot import BeamSearchBot
+
+# One game to play; ``variant`` is a config entry as described above
+GameSpec = namedtuple('GameSpec', 'game_id seed game_mode variant max_pieces piece_time')
+
+def play_game(spec):
+    """Play one headless game with the bot and return its result record"""
+    variant = spec.variant
+    engine = TetrisEngine(GameMode[spec.game_mode], seed=spec.seed, rules=variant.get('rules'))
+    bot = BeamSearchBot(variant.get('weights'), variant.get('beam_width', AUTOPLAY_BEAM_WIDTH),
+                        variant.get('depth', AUTOPLAY_DEPTH))
+    engine.start_game()
+    start = time.perf_counter()
+    pieces = 0
+    while not engine.is_over and pieces < spec.max_pieces:
+        if not bot.play_piece(engine):
+            break
+        pieces += 1
+        # The bot "thinks" for piece_time simulated ms, letting gravity and
+        # the Time Attack clock run
+        engine.step(dt=spec.piece_time)
+    return {
+        'game_id': spec.game_id,
+        'variant': variant.get('name', 'default'),
+        'seed': spec.seed,
+        'game_mode': spec.game_mode,
+        'score': engine.score,
+        'lines': engine.lines_cleared,
+        'level': engine.level,
+        'pieces': pieces,
+        'game_over': engine.is_over,
+        'duration_ms': engine.clock(),
+        'wall_seconds': round(time.perf_counter() - start, 4),
+        'bot_nodes': bot.nodes,
+    }
+
+def make_specs(games, seed=0, game_mode='CLASSIC', variants=None, max_pieces=500,
+               piece_time=AUTOPLAY_PIECE_DELAY):
+    """One GameSpec per (variant, game), sharing seeds across variants"""
+    variants = variants or [{'name': 'default'}]
+    return [GameSpec(len(variants) * i + j, seed + i, game_mode, variant, max_pieces, piece_time)
+            for i in range(games) for j, variant in enumerate(variants)]
+
+def run_tournament(specs, processes=None, output=None):
+    """Play ``specs`` on ``processes`` workers, appending results to ``output``.
+
+    Results are written (and flushed) in completion order. Returns the list
+    of results with a summary of wall time and games per second.
+    """
+    processes = processes or os.cpu_count() or 1
+    results = []
+    stream = open(output, 'a') if output else None
+
+    def record(result):
+        results.append(result)
+        if stream:
+            stream.write(json.dumps(result) + '\n')
+            stream.flush()
+
+    start = time.perf_counter()
+    try:
+        if processes == 1:
+            for result in map(play_game, specs):
+                record(result)
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                for result in pool.imap_unordered(play_game, specs):
+                    record(result)
+    finally:
+        if stream:
+            stream.close()
+    seconds = time.perf_counter() - start
+    summary = {'games': len(results), 'processes': processes, 'seconds': seconds,
+               'games_per_second': len(results) / seconds if seconds else 0.0}
+    return results, summary
+
+def summarize(results):
+    """Mean score, lines, level and pieces per variant"""
+    by_variant = {}
+    for result in results:
+        by_variant.setdefault(result['variant'], []).append(result)
+    table = {}
+    for name, games in by_variant.items():
+        table[name] = {key: sum(game[key] for game in games) / len(games)
+                       for key in ('score', 'lines', 'level', 'pieces')}
+        table[name]['games'] = len(games)
+    return table
+
+def measure_scaling(specs, process_counts):
+    """Games per second and parallel efficiency for each worker count"""
+    rows = []
+    base = None
+    for processes in process_counts:
+        _, summary = run_tournament(specs, processes)
+        rate = summary['games_per_second']
+        base = base or rate / processes
+        rows.append({'processes': processes, 'games_per_second': rate,
+                     'speedup': rate / base, 'efficiency': rate / (base * processes)})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Run seeded headless self-play games in parallel")
+    parser.add_argument('--games', type=int, default=32, help="games per variant")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--mode', default='CLASSIC', choices=[mode.name for mode in GameMode])
+    parser.add_argument('--config', help="JSON file with a list of variants")
+    parser.add_argument('--output', default='tournament_results.jsonl', help="JSON lines results file")
+    parser.add_argument('--processes', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--max-pieces', type=int, default=500, help="stop a game after this many pieces")
+    parser.add_argument('--piece-time', type=int, default=AUTOPLAY_PIECE_DELAY,
+                        help="simulated milliseconds per bot move")
+    parser.add_argument('--scaling', help="comma-separated worker counts to benchmark, e.g. 1,2,4")
+    args = parser.parse_args()
+
+    variants = None
+    if args.config:
+        with open(args.config) as f:
+            variants = json.load(f)
+    specs = make_specs(args.games, args.seed, args.mode, variants, args.max_pieces, args.piece_time)
+
+    if args.scaling:
+        for row in measure_scaling(specs, [int(n) for n in args.scaling.split(',')]):
+            print(f"{row['processes']:3d} processes: {row['games_per_second']:7.2f} games/s, "
+                  f"{row['speedup']:.2f}x speedup, {row['efficiency']:.0%} efficiency")
+        return
+
+    results, summary = run_tournament(specs, args.processes, args.output)
+    for name, row in summarize(results).items():
+        print(f"{name}: {row['games']} games, score {row['score']:.0f}, lines {row['lines']:.1f}, "
+              f"level {row['level']:.1f}, pieces {row['pieces']:.0f}")
+    print(f"{summary['games']} games in {summary['seconds']:.1f}s on {summary['processes']} processes "
+          f"({summary['games_per_second']:.2f} games/s), results in {args.output}")
+
+if __name__ == "__main__":
+    main()